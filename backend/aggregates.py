@@ -0,0 +1,249 @@
+"""
+Denormalized counters, ratings and daily sales rollups
+
+Farmer.total_orders, Dealer.total_sales, Expert.total_consultations and the
+profile rating/rating_count pairs are kept up to date by the write endpoints:
+each applies its delta with an UPDATE in the same transaction as the rows it
+writes, so listings read stored values instead of aggregating.
+
+- total_orders / total_sales: orders that are not cancelled, by farmer and
+  by the dealer of the ordered product
+- total_consultations: completed appointments, by expert
+- rating / rating_count: running average and count of the reviews of the
+  profile's user
+- dealer_daily_sales: orders, units and revenue per dealer, product, day
+  and status, read by the dealer dashboard
+
+recompute_aggregates() and rebuild_daily_sales() derive the same values from
+scratch in bulk for `manage_db.py reconcile` / `rollups` and the seeder.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm.attributes import set_committed_value
+from models import (
+    Order, Appointment, Review, Product, DealerDailySales,
+    UserRole, OrderStatus, AppointmentStatus
+)
+
+# Maintained here only; profile create/update endpoints must not set them
+AGGREGATE_FIELDS = {"rating", "rating_count", "total_orders", "total_sales", "total_consultations"}
+
+PROFILE_TABLES = {UserRole.FARMER: "farmers", UserRole.EXPERT: "experts", UserRole.DEALER: "dealers"}
+
+# Enum columns store member names
+CANCELLED = OrderStatus.CANCELLED.name
+COMPLETED = AppointmentStatus.COMPLETED.name
+
+# Counter deltas applied by the write endpoints (also audited by manage_db.py explain)
+FARMER_ORDERS_SQL = text("UPDATE farmers SET total_orders = total_orders + :n WHERE id = :farmer_id")
+DEALER_SALES_SQL = text(
+    "UPDATE dealers SET total_sales = total_sales + :n "
+    "WHERE id = (SELECT dealer_id FROM products WHERE id = :product_id)"
+)
+EXPERT_CONSULTATIONS_SQL = text(
+    "UPDATE experts SET total_consultations = total_consultations + :n WHERE id = :expert_id"
+)
+
+def review_rating_sql(table: str):
+    """Fold one :rating into the running average of the profile of :user_id"""
+    return text(
+        f"UPDATE {table} SET "
+        "rating = (coalesce(rating, 0) * rating_count + :rating) / (rating_count + 1), "
+        "rating_count = rating_count + 1 "
+        "WHERE user_id = :user_id"
+    )
+
+def product_dealers_query(product_ids):
+    """(product id, dealer id) of each product, to key the daily rollups"""
+    return select(Product.id, Product.dealer_id).where(Product.id.in_(product_ids))
+
+def guarded_status_update(model, row_id: int, current, status):
+    """Set ``status`` on one row, matching only while it still has ``current``"""
+    return (
+        update(model)
+        .where(model.id == row_id, model.status == current)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+
+def order_counts(order: Order) -> bool:
+    return order.status != OrderStatus.CANCELLED
+
+def appointment_counts(appointment: Appointment) -> bool:
+    return appointment.status == AppointmentStatus.COMPLETED
+
+async def apply_orders(session, orders: Iterable[Order], sign: int = 1) -> None:
+    """Add (or with sign=-1 remove) orders to the counters and daily rollups"""
+    orders = list(orders)
+    await apply_daily_sales(session, orders, sign)
+    counted = [order for order in orders if order_counts(order)]
+    if not counted:
+        return
+    by_farmer = Counter(order.farmer_id for order in counted)
+    by_product = Counter(order.product_id for order in counted)
+    await session.execute(
+        FARMER_ORDERS_SQL,
+        [{"farmer_id": farmer_id, "n": sign * n} for farmer_id, n in by_farmer.items()],
+    )
+    await session.execute(
+        DEALER_SALES_SQL,
+        [{"product_id": product_id, "n": sign * n} for product_id, n in by_product.items()],
+    )
+
+async def change_order_status(session, order: Order, status: OrderStatus) -> bool:
+    """Move an order to ``status``, shifting it between counters and rollup rows
+
+    The UPDATE only matches while the order still has the status it was
+    loaded with, so two concurrent changes cannot both apply their deltas;
+    returns False when the order changed underneath.
+    """
+    result = await session.execute(guarded_status_update(Order, order.id, order.status, status))
+    if result.rowcount == 0:
+        return False
+    await apply_orders(session, [order], sign=-1)
+    set_committed_value(order, "status", status)
+    await apply_orders(session, [order])
+    return True
+
+async def apply_daily_sales(session, orders: Iterable[Order], sign: int = 1) -> None:
+    """Upsert the orders into their (dealer, day, product, status) rollup rows"""
+    orders = list(orders)
+    if not orders:
+        return
+    result = await session.execute(
+        product_dealers_query({order.product_id for order in orders})
+    )
+    dealers = dict(result.all())
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for order in orders:
+        if order.product_id not in dealers:
+            continue
+        key = (dealers[order.product_id], order.created_at.date(), order.product_id, OrderStatus(order.status))
+        delta = deltas[key]
+        delta[0] += sign
+        delta[1] += sign * order.quantity
+        delta[2] += sign * order.total_amount
+    if not deltas:
+        return
+    
+    statement = insert(DealerDailySales)
+    table = DealerDailySales.__table__
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.dealer_id, table.c.day, table.c.product_id, table.c.status],
+            set_={
+                "orders": table.c.orders + statement.excluded.orders,
+                "units": table.c.units + statement.excluded.units,
+                "revenue": table.c.revenue + statement.excluded.revenue,
+            },
+        ),
+        [
+            {"dealer_id": dealer_id, "day": day, "product_id": product_id, "status": status,
+             "orders": n, "units": units, "revenue": revenue}
+            for (dealer_id, day, product_id, status), (n, units, revenue) in deltas.items()
+        ],
+    )
+
+async def apply_appointments(session, appointments: Iterable[Appointment], sign: int = 1) -> None:
+    """Add (or with sign=-1 remove) completed appointments to their expert's counter"""
+    by_expert = Counter(a.expert_id for a in appointments if appointment_counts(a))
+    if by_expert:
+        await session.execute(
+            EXPERT_CONSULTATIONS_SQL,
+            [{"expert_id": expert_id, "n": sign * n} for expert_id, n in by_expert.items()],
+        )
+
+async def change_appointment_status(session, appointment: Appointment, status: AppointmentStatus) -> bool:
+    """Move an appointment to ``status``, shifting it in or out of its expert's counter
+
+    Guarded like change_order_status; returns False when the appointment
+    changed underneath.
+    """
+    result = await session.execute(
+        guarded_status_update(Appointment, appointment.id, appointment.status, status)
+    )
+    if result.rowcount == 0:
+        return False
+    await apply_appointments(session, [appointment], sign=-1)
+    set_committed_value(appointment, "status", status)
+    await apply_appointments(session, [appointment])
+    return True
+
+async def apply_review(session, review: Review, role: UserRole) -> None:
+    """Fold a new review into the running average of the reviewed user's profile"""
+    table = PROFILE_TABLES.get(role)
+    if table is None:
+        return
+    await session.execute(
+        review_rating_sql(table),
+        {"rating": review.rating, "user_id": review.reviewed_id},
+    )
+
+# (column, table, source): source yields (key, value[, count]) per profile;
+# key matches the table's join column
+RECOMPUTE = [
+    ("total_orders", "farmers", "id", f"""
+        SELECT farmer_id AS key, count(*) AS value FROM orders
+        WHERE status != '{CANCELLED}' GROUP BY farmer_id"""),
+    ("total_sales", "dealers", "id", f"""
+        SELECT products.dealer_id AS key, count(*) AS value
+        FROM orders JOIN products ON products.id = orders.product_id
+        WHERE orders.status != '{CANCELLED}' GROUP BY products.dealer_id"""),
+    ("total_consultations", "experts", "id", f"""
+        SELECT expert_id AS key, count(*) AS value FROM appointments
+        WHERE status = '{COMPLETED}' GROUP BY expert_id"""),
+]
+
+RATINGS = """SELECT reviewed_id AS key, avg(rating) AS value, count(*) AS n
+             FROM reviews GROUP BY reviewed_id"""
+
+async def recompute_aggregates(conn, after: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Recompute every counter and rating from the source tables
+
+    Each source table is aggregated once (GROUP BY) and joined back with
+    UPDATE ... FROM; profiles with no rows are reset to zero. Only profiles
+    with an id above ``after[table]`` are touched (the seeder passes the ids
+    it started from). Returns the number of rows corrected per column; run
+    inside the caller's transaction.
+    """
+    after = after or {}
+    corrected = {}
+    for column, table, key, source in RECOMPUTE:
+        params = {"after": after.get(table, 0)}
+        updated = await conn.execute(text(f"""
+            UPDATE {table} SET {column} = agg.value FROM ({source}) AS agg
+            WHERE agg.key = {table}.{key} AND {table}.id > :after
+              AND {table}.{column} IS NOT agg.value"""), params)
+        reset = await conn.execute(text(f"""
+            UPDATE {table} SET {column} = 0
+            WHERE id > :after AND {column} != 0
+              AND {key} NOT IN (SELECT key FROM ({source}))"""), params)
+        corrected[f"{table}.{column}"] = updated.rowcount + reset.rowcount
+
+    for table in PROFILE_TABLES.values():
+        params = {"after": after.get(table, 0)}
+        updated = await conn.execute(text(f"""
+            UPDATE {table} SET rating = agg.value, rating_count = agg.n FROM ({RATINGS}) AS agg
+            WHERE agg.key = {table}.user_id AND {table}.id > :after
+              AND (rating_count IS NOT agg.n OR rating IS NULL OR abs(rating - agg.value) > 1e-9)"""), params)
+        reset = await conn.execute(text(f"""
+            UPDATE {table} SET rating = 0.0, rating_count = 0
+            WHERE id > :after AND (rating_count != 0 OR rating IS NULL OR rating != 0)
+              AND user_id NOT IN (SELECT reviewed_id FROM reviews)"""), params)
+        corrected[f"{table}.rating"] = updated.rowcount + reset.rowcount
+    return corrected
+
+async def rebuild_daily_sales(conn) -> int:
+    """Rebuild dealer_daily_sales from the orders table; returns the rollup row count"""
+    await conn.execute(delete(DealerDailySales))
+    await conn.execute(text("""
+        INSERT INTO dealer_daily_sales (dealer_id, day, product_id, status, orders, units, revenue)
+        SELECT products.dealer_id, date(orders.created_at), orders.product_id, orders.status,
+               count(*), sum(orders.quantity), sum(orders.total_amount)
+        FROM orders JOIN products ON products.id = orders.product_id
+        GROUP BY products.dealer_id, date(orders.created_at), orders.product_id, orders.status"""))
+    result = await conn.execute(text("SELECT count(*) FROM dealer_daily_sales"))
+    return result.scalar_one()
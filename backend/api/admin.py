@@ -1,58 +1,207 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from database import get_session
+from sqlalchemy import Select, Update, select, tuple_, update
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import settings
+from database import get_session, get_write_session
+from api.pagination import PageParams, page_params, paginate, page_response
 from models import User, UserRole
-from api.auth import get_current_user
+from schemas import UserRead
+from api.auth import get_current_user, invalidate_principal, principal_cache
+from api import products
 
 router = APIRouter()
 
+class UserFilter(BaseModel):
+    role: Optional[UserRole] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class BatchUserRequest(BaseModel):
+    # Either explicit ids or a filter over pending users
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=settings.admin_batch_max_users)
+    filter: Optional[UserFilter] = None
+
+class BatchUserResult(BaseModel):
+    id: int
+    outcome: str  # approved/rejected, not_pending or not_found
+    status: Optional[str] = None  # current status when not_pending
+
+class BatchUserResponse(BaseModel):
+    updated: int
+    not_pending: int
+    not_found: int
+    results: List[BatchUserResult]
+
 async def get_current_admin(current_user: User = Depends(get_current_user)):
     """Ensure current user is admin"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
-@router.get("/users/pending")
+def pending_criteria(role: Optional[UserRole], created_from: Optional[datetime], created_to: Optional[datetime]) -> list:
+    """WHERE clauses for pending users; served by ix_users_status_created_at"""
+    criteria = [User.status == "pending"]
+    if created_from is not None:
+        criteria.append(User.created_at >= created_from)
+    if created_to is not None:
+        criteria.append(User.created_at < created_to)
+    if role is not None:
+        criteria.append(User.role == role)
+    return criteria
+
+def pending_chunk_query(criteria: list, last: Optional[tuple], limit: int) -> Select:
+    """Ids of the next pending users after the (created_at, id) keyset ``last``"""
+    query = select(User.id, User.created_at).where(*criteria)
+    if last is not None:
+        query = query.where(tuple_(User.created_at, User.id) > tuple_(*last))
+    return query.order_by(User.created_at, User.id).limit(limit)
+
+def status_update_statement(ids: List[int], status: str, pending_only: bool = True) -> Update:
+    """Set ``status`` on the given users, returning the (id, email) of each one changed"""
+    criteria = [User.id.in_(ids)]
+    if pending_only:
+        criteria.append(User.status == "pending")
+    return (
+        update(User)
+        .where(*criteria)
+        .values(status=status, updated_at=datetime.utcnow())
+        .returning(User.id, User.email)
+        .execution_options(synchronize_session=False)
+    )
+
+def chunks(ids: List[int], size: int):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+async def set_user_status(
+    session: AsyncSession, ids: List[int], status: str, pending_only: bool = True
+) -> Dict[int, BatchUserResult]:
+    """Set ``status`` on users, one UPDATE ... WHERE id IN (...) per chunk
+
+    Each chunk is its own short write transaction, so other writers get the
+    database lock between chunks. Returns an outcome per requested id.
+    """
+    outcome = "approved" if status == "approved" else "rejected"
+    results = {}
+    for chunk in chunks(list(dict.fromkeys(ids)), settings.admin_batch_chunk_size):
+        result = await session.execute(status_update_statement(chunk, status, pending_only))
+        updated = result.all()
+        missing = set(chunk) - {user_id for user_id, _ in updated}
+        current = {}
+        if missing:
+            result = await session.execute(select(User.id, User.status).where(User.id.in_(missing)))
+            current = dict(result.all())
+        await session.commit()
+        
+        for user_id, email in updated:
+            invalidate_principal(email)
+            results[user_id] = BatchUserResult(id=user_id, outcome=outcome)
+        for user_id in missing:
+            if user_id in current:
+                results[user_id] = BatchUserResult(id=user_id, outcome="not_pending", status=current[user_id])
+            else:
+                results[user_id] = BatchUserResult(id=user_id, outcome="not_found")
+    return results
+
+async def set_status_batch(session: AsyncSession, batch: BatchUserRequest, status: str) -> dict:
+    if (batch.ids is None) == (batch.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter")
+    
+    if batch.ids is not None:
+        results = await set_user_status(session, batch.ids, status)
+        ordered = [results[user_id] for user_id in dict.fromkeys(batch.ids)]
+    else:
+        # Walk the matching pending users oldest first, a chunk at a time,
+        # with a (created_at, id) keyset over ix_users_status_created_at
+        criteria = pending_criteria(batch.filter.role, batch.filter.created_from, batch.filter.created_to)
+        ordered = []
+        last = None
+        while len(ordered) < settings.admin_batch_max_users:
+            limit = min(settings.admin_batch_chunk_size, settings.admin_batch_max_users - len(ordered))
+            rows = (await session.execute(pending_chunk_query(criteria, last, limit))).all()
+            if not rows:
+                break
+            last = (rows[-1].created_at, rows[-1].id)
+            ids = [row.id for row in rows]
+            results = await set_user_status(session, ids, status)
+            ordered.extend(results[user_id] for user_id in ids)
+    
+    outcomes = [result.outcome for result in ordered]
+    return {
+        "updated": len(outcomes) - outcomes.count("not_pending") - outcomes.count("not_found"),
+        "not_pending": outcomes.count("not_pending"),
+        "not_found": outcomes.count("not_found"),
+        "results": ordered,
+    }
+
+@router.get("/users/pending", response_model=List[UserRead])
 async def get_pending_users(
+    request: Request,
+    response: Response,
+    role: Optional[UserRole] = Query(None, description="Only users with this role"),
+    created_from: Optional[datetime] = Query(None, description="Registered at or after"),
+    created_to: Optional[datetime] = Query(None, description="Registered before"),
+    page: PageParams = Depends(page_params),
     current_admin: User = Depends(get_current_admin),
     session: AsyncSession = Depends(get_session)
 ):
-    """Get all pending users for approval"""
-    result = await session.execute(
-        select(User).where(User.status == "pending")
+    """Get pending users for approval, oldest registration first"""
+    rows = await paginate(
+        session, User, UserRead, page, request, response,
+        *pending_criteria(role, created_from, created_to),
+        order_by=User.created_at,
     )
-    users = result.scalars().all()
-    return users
+    return page_response(rows, response)
+
+@router.post("/users/approve", response_model=BatchUserResponse, response_model_exclude_none=True)
+async def approve_users(
+    batch: BatchUserRequest,
+    current_admin: User = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Approve pending users by id or by filter, with an outcome per user"""
+    return await set_status_batch(session, batch, "approved")
+
+@router.post("/users/reject", response_model=BatchUserResponse, response_model_exclude_none=True)
+async def reject_users(
+    batch: BatchUserRequest,
+    current_admin: User = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Reject pending users by id or by filter, with an outcome per user"""
+    return await set_status_batch(session, batch, "rejected")
 
 @router.put("/users/{user_id}/approve")
 async def approve_user(
     user_id: int,
     current_admin: User = Depends(get_current_admin),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_write_session)
 ):
     """Approve a pending user"""
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
+    results = await set_user_status(session, [user_id], "approved", pending_only=False)
+    if results[user_id].outcome == "not_found":
         raise HTTPException(status_code=404, detail="User not found")
-    
-    user.status = "approved"
-    await session.commit()
     return {"message": "User approved successfully"}
 
 @router.put("/users/{user_id}/reject")
 async def reject_user(
     user_id: int,
     current_admin: User = Depends(get_current_admin),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_write_session)
 ):
     """Reject a pending user"""
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
+    results = await set_user_status(session, [user_id], "rejected", pending_only=False)
+    if results[user_id].outcome == "not_found":
         raise HTTPException(status_code=404, detail="User not found")
-    
-    user.status = "rejected"
-    await session.commit()
-    return {"message": "User rejected successfully"} 
\ No newline at end of file
+    return {"message": "User rejected successfully"}
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_admin: User = Depends(get_current_admin)):
+    """Get hit/miss counters for the in-process caches of this worker"""
+    return {
+        "principals": principal_cache.stats(),
+        "catalog": {**products.catalog_cache.stats(), "version": products.catalog_version},
+    }
@@ -1,26 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from database import get_session
-from models import Appointment
+from sqlalchemy import Select, select
+from datetime import datetime
+from typing import List, Optional
+from database import get_session, get_write_session
+from api.auth import get_current_user
+from api.pagination import PageParams, page_params, paginate, page_response
+from models import Appointment, Farmer, Expert, User, UserRole, AppointmentStatus
+from aggregates import change_appointment_status
+from schemas import AppointmentRead
 
 router = APIRouter()
 
-@router.get("/")
-async def get_appointments(session: AsyncSession = Depends(get_session)):
+class AppointmentCreate(BaseModel):
+    farmer_id: int
+    expert_id: int
+    service_type: str = Field(min_length=1)
+    preferred_date: datetime
+    notes: Optional[str] = None
+
+class AppointmentStatusUpdate(BaseModel):
+    status: AppointmentStatus
+
+# Appointments in these states can no longer change
+FINAL_STATUSES = {AppointmentStatus.CANCELLED}
+
+def appointment_parties_query(appointment_id: int) -> Select:
+    """An appointment with the user ids of its farmer and expert"""
+    return (
+        select(Appointment, Farmer.user_id, Expert.user_id)
+        .join(Farmer, Farmer.id == Appointment.farmer_id)
+        .join(Expert, Expert.id == Appointment.expert_id)
+        .where(Appointment.id == appointment_id)
+    )
+
+@router.get("/", response_model=List[AppointmentRead])
+async def get_appointments(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session)
+):
     """Get all appointments"""
-    result = await session.execute(select(Appointment))
-    appointments = result.scalars().all()
-    return appointments
+    rows = await paginate(session, Appointment, AppointmentRead, page, request, response)
+    return page_response(rows, response)
 
-@router.post("/")
+@router.post("/", response_model=AppointmentRead)
 async def create_appointment(
-    appointment_data: dict,
-    session: AsyncSession = Depends(get_session)
+    appointment_data: AppointmentCreate,
+    session: AsyncSession = Depends(get_write_session)
 ):
-    """Create a new appointment"""
-    appointment = Appointment(**appointment_data)
+    """Book a new appointment
+
+    Appointments always start out pending; only the status endpoint moves
+    them on (and into the expert's total_consultations once completed).
+    """
+    appointment = Appointment(**appointment_data.model_dump(), status=AppointmentStatus.PENDING)
     session.add(appointment)
     await session.commit()
     await session.refresh(appointment)
-    return appointment 
\ No newline at end of file
+    return appointment
+
+@router.put("/{appointment_id}/status", response_model=AppointmentRead)
+async def update_appointment_status(
+    appointment_id: int,
+    status_update: AppointmentStatusUpdate,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Move an appointment to a new status (booking farmer, expert or admin)
+
+    The expert's total_consultations moves with it in the same transaction
+    when the appointment becomes or stops being completed.
+    """
+    result = await session.execute(appointment_parties_query(appointment_id))
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    appointment, farmer_user_id, expert_user_id = row
+    if current_user.role != UserRole.ADMIN and current_user.id not in (farmer_user_id, expert_user_id):
+        raise HTTPException(status_code=403, detail="Not allowed to update this appointment")
+    
+    if status_update.status == appointment.status:
+        return appointment
+    if appointment.status in FINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Appointment is already {appointment.status.value}")
+    if not await change_appointment_status(session, appointment, status_update.status):
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Appointment was updated concurrently, retry")
+    
+    await session.commit()
+    return appointment
@@ -1,18 +1,70 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
-from database import get_session
+from typing import Optional, Tuple
+from database import get_session, get_write_session
 from models import User, UserRole
 from config import settings
+from cache import TTLCache
 
 router = APIRouter()
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds
+)
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel while the
+# event loop keeps serving other requests
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+_pending_hash_jobs = 0
+
+# Authenticated users keyed by token subject (email). Role, status and
+# is_active rarely change; in this process they only change through
+# admin.set_user_status, which calls invalidate_principal. Registration needs
+# no invalidation since lookups of unknown emails are not cached, and changes
+# made by manage_db.py or the seeder are picked up within the TTL.
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_max_entries,
+    ttl=settings.principal_cache_ttl_seconds
+)
+
+# Last invalidation of each email as (sequence number, monotonic time), oldest
+# first, so a lookup that read the row before a concurrent change does not
+# cache what it read. Entries older than the principal TTL are pruned: every
+# lookup they could have overtaken has finished long before.
+principal_versions: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+_invalidation_sequence = itertools.count(1)
+
+def principal_version(email: str) -> Optional[int]:
+    entry = principal_versions.get(email)
+    return entry[0] if entry is not None else None
+
+def invalidate_principal(email: str) -> None:
+    """Drop a cached principal after its role or status changes"""
+    principal_cache.invalidate(email)
+    now = time.monotonic()
+    principal_versions[email] = (next(_invalidation_sequence), now)
+    principal_versions.move_to_end(email)
+    while principal_versions:
+        oldest, (_, invalidated_at) = next(iter(principal_versions.items()))
+        if now - invalidated_at <= principal_cache.ttl:
+            break
+        del principal_versions[oldest]
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -20,6 +72,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def run_password_job(func, *args):
+    """Run a bcrypt call on the hashing pool, shedding load once the queue is full"""
+    global _pending_hash_jobs
+    if _pending_hash_jobs >= settings.password_hash_max_pending:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending_hash_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_hash_executor, func, *args)
+    finally:
+        _pending_hash_jobs -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_password_job(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -47,10 +121,18 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    result = await session.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise credentials_exception
+    cached = principal_cache.get(email)
+    if cached is not None:
+        # Hand out a fresh detached copy so request handlers never share state
+        user = User.model_validate(cached)
+    else:
+        version = principal_version(email)
+        result = await session.execute(select(User).where(User.email == email))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        if principal_version(email) == version:
+            principal_cache.set(email, user.model_dump())
     
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Account is deactivated")
@@ -68,15 +150,20 @@ async def register(
     name: str,
     phone: str,
     role: UserRole,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    write_session: AsyncSession = Depends(get_write_session)
 ):
     # Check if user already exists
     result = await session.execute(select(User).where(User.email == email))
-    if result.scalar_one_or_none():
+    exists = result.scalar_one_or_none() is not None
+    # Return the pooled connection before the slow hash
+    await session.close()
+    if exists:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Create new user
-    hashed_password = get_password_hash(password)
+    # Hash outside the write transaction, which would otherwise hold the
+    # database write lock for the whole bcrypt run
+    hashed_password = await get_password_hash_async(password)
     user = User(
         email=email,
         hashed_password=hashed_password,
@@ -86,9 +173,14 @@ async def register(
         status="pending" if role != UserRole.ADMIN else "approved"
     )
     
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    write_session.add(user)
+    try:
+        await write_session.commit()
+    except IntegrityError:
+        # Registered concurrently since the check above
+        await write_session.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await write_session.refresh(user)
     
     return {"message": "User registered successfully", "user_id": user.id}
 
@@ -101,8 +193,10 @@ async def login(
     # Find user
     result = await session.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
+    # Return the pooled connection before the slow hash check
+    await session.close()
     
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
     if not user.is_active:
@@ -1,21 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Select, select
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from config import settings
 from database import get_session
-from models import Dealer
+from api.auth import get_current_user
+from api.pagination import PageParams, page_params, paginate, page_response
+from models import Dealer, DealerDailySales, User, UserRole, OrderStatus
+from schemas import DealerRead
 
 router = APIRouter()
 
-@router.get("/")
-async def get_dealers(session: AsyncSession = Depends(get_session)):
-    """Get all approved dealers"""
-    result = await session.execute(
-        select(Dealer).where(Dealer.is_active == True)
+class SalesFigures(BaseModel):
+    # orders, units and revenue exclude cancelled orders; statuses counts
+    # orders in every status
+    orders: int = 0
+    units: int = 0
+    revenue: float = 0.0
+    statuses: Dict[str, int] = {}
+
+class DailyProductSales(SalesFigures):
+    day: date
+    product_id: int
+
+class DealerDashboard(BaseModel):
+    dealer_id: int
+    start: date
+    end: date
+    totals: SalesFigures
+    days: List[DailyProductSales]
+
+def add_sales(figures: SalesFigures, status: OrderStatus, orders: int, units: int, revenue: float) -> None:
+    if not orders:
+        return
+    figures.statuses[status.value] = figures.statuses.get(status.value, 0) + orders
+    if status != OrderStatus.CANCELLED:
+        figures.orders += orders
+        figures.units += units
+        figures.revenue = round(figures.revenue + revenue, 2)
+
+def dashboard_query(dealer_id: int, start: date, end: date, product_id: Optional[int] = None) -> Select:
+    """A dealer's rollup rows from start to end inclusive, by day and product"""
+    query = select(DealerDailySales).where(
+        DealerDailySales.dealer_id == dealer_id,
+        DealerDailySales.day >= start,
+        DealerDailySales.day <= end,
     )
-    dealers = result.scalars().all()
-    return dealers
+    if product_id is not None:
+        query = query.where(DealerDailySales.product_id == product_id)
+    return query.order_by(DealerDailySales.day, DealerDailySales.product_id)
 
-@router.get("/{dealer_id}")
+@router.get("/", response_model=List[DealerRead])
+async def get_dealers(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session)
+):
+    """Get all approved dealers"""
+    rows = await paginate(session, Dealer, DealerRead, page, request, response, Dealer.is_active == True)
+    return page_response(rows, response)
+
+@router.get("/{dealer_id}", response_model=DealerRead)
 async def get_dealer(dealer_id: int, session: AsyncSession = Depends(get_session)):
     """Get specific dealer by ID"""
     result = await session.execute(
@@ -24,4 +72,54 @@ async def get_dealer(dealer_id: int, session: AsyncSession = Depends(get_session
     dealer = result.scalar_one_or_none()
     if not dealer:
         raise HTTPException(status_code=404, detail="Dealer not found")
-    return dealer 
\ No newline at end of file
+    return dealer
+
+@router.get("/{dealer_id}/dashboard", response_model=DealerDashboard)
+async def get_dealer_dashboard(
+    dealer_id: int,
+    start: Optional[date] = Query(None, description="First day (UTC), default end minus 30 days"),
+    end: Optional[date] = Query(None, description="Last day (UTC), inclusive, default today"),
+    product_id: Optional[int] = Query(None, description="Only this product"),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Sales per product per day for a dealer, read from the daily rollups
+
+    Reads only dealer_daily_sales (one index range over dealer and day), so
+    the cost depends on the date range, not on the number of orders.
+    """
+    result = await session.execute(select(Dealer.user_id).where(Dealer.id == dealer_id))
+    owner_id = result.scalar_one_or_none()
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Dealer not found")
+    if current_user.role != UserRole.ADMIN and current_user.id != owner_id:
+        raise HTTPException(status_code=403, detail="Not allowed to view this dashboard")
+    
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=settings.dealer_dashboard_default_days - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days + 1 > settings.dealer_dashboard_max_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range is limited to {settings.dealer_dashboard_max_days} days"
+        )
+    
+    result = await session.execute(dashboard_query(dealer_id, start, end, product_id))
+    
+    totals = SalesFigures()
+    days = {}
+    for rollup in result.scalars():
+        key = (rollup.day, rollup.product_id)
+        if key not in days:
+            days[key] = DailyProductSales(day=rollup.day, product_id=rollup.product_id)
+        for figures in (days[key], totals):
+            add_sales(figures, rollup.status, rollup.orders, rollup.units, rollup.revenue)
+    
+    return DealerDashboard(
+        dealer_id=dealer_id,
+        start=start,
+        end=end,
+        totals=totals,
+        days=[figures for figures in days.values() if figures.statuses],
+    )
@@ -1,22 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from database import get_session
+from typing import List
+from database import get_session, get_write_session
+from api.pagination import PageParams, page_params, paginate, page_response
 from models import Expert, User
+from schemas import ExpertRead
 from api.auth import get_current_user
+from aggregates import AGGREGATE_FIELDS
 
 router = APIRouter()
 
-@router.get("/")
-async def get_experts(session: AsyncSession = Depends(get_session)):
+@router.get("/", response_model=List[ExpertRead])
+async def get_experts(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session)
+):
     """Get all approved experts"""
-    result = await session.execute(
-        select(Expert).where(Expert.is_active == True)
-    )
-    experts = result.scalars().all()
-    return experts
+    rows = await paginate(session, Expert, ExpertRead, page, request, response, Expert.is_active == True)
+    return page_response(rows, response)
 
-@router.get("/{expert_id}")
+@router.get("/{expert_id}", response_model=ExpertRead)
 async def get_expert(expert_id: int, session: AsyncSession = Depends(get_session)):
     """Get specific expert by ID"""
     result = await session.execute(
@@ -27,11 +33,11 @@ async def get_expert(expert_id: int, session: AsyncSession = Depends(get_session
         raise HTTPException(status_code=404, detail="Expert not found")
     return expert
 
-@router.post("/")
+@router.post("/", response_model=ExpertRead)
 async def create_expert(
     expert_data: dict,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_write_session)
 ):
     """Create a new expert profile"""
     # Check if user is already an expert
@@ -43,7 +49,7 @@ async def create_expert(
     
     expert = Expert(
         user_id=current_user.id,
-        **expert_data
+        **{key: value for key, value in expert_data.items() if key not in AGGREGATE_FIELDS}
     )
     session.add(expert)
     await session.commit()
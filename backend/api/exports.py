@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from database import AsyncSessionLocal
+from models import User, Product, Order
+from api.admin import get_current_admin
+
+router = APIRouter()
+
+EXPORT_BATCH_SIZE = 1000
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_columns(model, exclude=()):
+    return [column for column in model.__table__.columns if column.name not in exclude]
+
+EXPORTS = {
+    "orders": (Order, export_columns(Order)),
+    "products": (Product, export_columns(Product)),
+    # Never export password hashes
+    "users": (User, export_columns(User, exclude=("hashed_password",))),
+}
+
+def to_plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def encode_ndjson(rows, columns) -> str:
+    return "".join(
+        json.dumps({name: to_plain(row[name]) for name in columns}, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+def encode_csv(rows, columns) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([to_plain(row[name]) for name in columns] for row in rows)
+    return buffer.getvalue()
+
+def export_query(model, columns, since: Optional[datetime], until: Optional[datetime]):
+    """Every row of ``model`` in id order, optionally within a created_at window"""
+    query = select(*columns).order_by(model.id)
+    if since is not None:
+        query = query.where(model.created_at >= since)
+    if until is not None:
+        query = query.where(model.created_at < until)
+    return query
+
+async def stream_rows(model, columns, fmt: str, since: Optional[datetime], until: Optional[datetime]):
+    """Yield encoded chunks of at most EXPORT_BATCH_SIZE rows from a server-side cursor
+
+    The session is opened inside the generator so it lives exactly as long as
+    the response body is being sent.
+    """
+    names = [column.name for column in columns]
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    if fmt == "csv":
+        yield encode_csv([dict(zip(names, names))], names)
+
+    query = export_query(model, columns, since, until)
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.mappings().partitions():
+            yield encode(rows, names)
+
+@router.get("/{resource}")
+async def export_table(
+    resource: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only rows created before this time"),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Stream a full table export as NDJSON or CSV with constant memory use"""
+    if resource not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {resource}")
+    model, columns = EXPORTS[resource]
+    filename = f"{resource}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        stream_rows(model, columns, format, since, until),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
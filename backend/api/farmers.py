@@ -1,22 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from database import get_session
+from typing import List
+from database import get_session, get_write_session
+from api.pagination import PageParams, page_params, paginate, page_response
 from models import Farmer, User
+from schemas import FarmerRead
 from api.auth import get_current_user
+from aggregates import AGGREGATE_FIELDS
 
 router = APIRouter()
 
-@router.get("/")
-async def get_farmers(session: AsyncSession = Depends(get_session)):
+@router.get("/", response_model=List[FarmerRead])
+async def get_farmers(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session)
+):
     """Get all approved farmers"""
-    result = await session.execute(
-        select(Farmer).where(Farmer.is_active == True)
-    )
-    farmers = result.scalars().all()
-    return farmers
+    rows = await paginate(session, Farmer, FarmerRead, page, request, response, Farmer.is_active == True)
+    return page_response(rows, response)
 
-@router.get("/{farmer_id}")
+@router.get("/{farmer_id}", response_model=FarmerRead)
 async def get_farmer(farmer_id: int, session: AsyncSession = Depends(get_session)):
     """Get specific farmer by ID"""
     result = await session.execute(
@@ -27,11 +33,11 @@ async def get_farmer(farmer_id: int, session: AsyncSession = Depends(get_session
         raise HTTPException(status_code=404, detail="Farmer not found")
     return farmer
 
-@router.post("/")
+@router.post("/", response_model=FarmerRead)
 async def create_farmer(
     farmer_data: dict,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_write_session)
 ):
     """Create a new farmer profile"""
     # Check if user is already a farmer
@@ -43,19 +49,19 @@ async def create_farmer(
     
     farmer = Farmer(
         user_id=current_user.id,
-        **farmer_data
+        **{key: value for key, value in farmer_data.items() if key not in AGGREGATE_FIELDS}
     )
     session.add(farmer)
     await session.commit()
     await session.refresh(farmer)
     return farmer
 
-@router.put("/{farmer_id}")
+@router.put("/{farmer_id}", response_model=FarmerRead)
 async def update_farmer(
     farmer_id: int,
     farmer_data: dict,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_write_session)
 ):
     """Update farmer profile"""
     result = await session.execute(
@@ -66,7 +72,8 @@ async def update_farmer(
         raise HTTPException(status_code=404, detail="Farmer not found")
     
     for key, value in farmer_data.items():
-        setattr(farmer, key, value)
+        if key not in AGGREGATE_FIELDS:
+            setattr(farmer, key, value)
     
     await session.commit()
     await session.refresh(farmer)
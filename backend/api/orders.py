@@ -1,26 +1,213 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from database import get_session
-from models import Order
+from sqlalchemy import Select, Update, select, update
+from datetime import datetime
+from typing import List, Optional
+from database import get_session, get_write_session
+from api.auth import get_current_user
+from api.pagination import PageParams, page_params, paginate, page_response
+from api.products import invalidate_catalog
+from aggregates import apply_orders, change_order_status
+from models import Order, Product, Farmer, Dealer, User, UserRole, OrderStatus
+from schemas import OrderRead
 
 router = APIRouter()
 
-@router.get("/")
-async def get_orders(session: AsyncSession = Depends(get_session)):
+MAX_BATCH_LINES = 100
+
+class OrderLine(BaseModel):
+    product_id: int
+    quantity: int = Field(gt=0)
+
+class BatchOrderRequest(BaseModel):
+    farmer_id: int
+    delivery_address: str = Field(min_length=1)
+    items: List[OrderLine] = Field(min_length=1, max_length=MAX_BATCH_LINES)
+    # Reject the whole cart (409) if any line fails, instead of placing the rest
+    all_or_nothing: bool = False
+
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus
+
+# Orders in these states can no longer change
+FINAL_STATUSES = {OrderStatus.DELIVERED, OrderStatus.CANCELLED}
+
+class BatchLineResult(BaseModel):
+    line: int
+    product_id: int
+    status: str  # created, failed or not_placed
+    error: Optional[str] = None
+    order_id: Optional[int] = None
+    total_amount: Optional[float] = None
+
+class BatchOrderResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchLineResult]
+
+def reserve_stock_statement(product_id: int, quantity: int) -> Update:
+    """Take quantity out of a product's stock if it has that much, returning its price"""
+    return (
+        update(Product)
+        .where(Product.id == product_id, Product.stock_quantity >= quantity)
+        .values(stock_quantity=Product.stock_quantity - quantity)
+        .returning(Product.price)
+        .execution_options(synchronize_session=False)
+    )
+
+def order_parties_query(order_id: int) -> Select:
+    """An order with the user ids of its buyer and of the selling dealer"""
+    return (
+        select(Order, Farmer.user_id, Dealer.user_id)
+        .join(Farmer, Farmer.id == Order.farmer_id)
+        .join(Product, Product.id == Order.product_id)
+        .join(Dealer, Dealer.id == Product.dealer_id)
+        .where(Order.id == order_id)
+    )
+
+@router.get("/", response_model=List[OrderRead])
+async def get_orders(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session)
+):
     """Get all orders"""
-    result = await session.execute(select(Order))
-    orders = result.scalars().all()
-    return orders
+    rows = await paginate(session, Order, OrderRead, page, request, response)
+    return page_response(rows, response)
 
-@router.post("/")
+@router.post("/", response_model=OrderRead)
 async def create_order(
     order_data: dict,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_write_session)
 ):
-    """Create a new order"""
+    """Create a new order
+
+    Stock is not reserved here, so the order is not marked stock_reserved
+    and cancelling it leaves the product's stock alone.
+    """
+    order_data.pop("stock_reserved", None)
     order = Order(**order_data)
     session.add(order)
+    await apply_orders(session, [order])
     await session.commit()
     await session.refresh(order)
-    return order 
\ No newline at end of file
+    return order
+
+@router.post("/batch", response_model=BatchOrderResponse, response_model_exclude_none=True)
+async def create_orders_batch(
+    batch: BatchOrderRequest,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Place a multi-item cart in one transaction, reserving stock per line
+
+    Only the farmer the cart is for (or an admin) may place it. Each line
+    decrements stock with a conditional UPDATE (stock >= quantity), so
+    concurrent buyers can never oversell. Lines that fail are reported
+    individually; the rest are committed together with the farmer's and
+    dealers' order counters.
+    """
+    # The write session takes SQLite's write lock on this first statement, so
+    # the stock checks and the order inserts below all happen in a single
+    # write transaction
+    farmer = await session.execute(select(Farmer.user_id).where(Farmer.id == batch.farmer_id))
+    farmer_user_id = farmer.scalar_one_or_none()
+    if farmer_user_id is None:
+        raise HTTPException(status_code=404, detail="Farmer not found")
+    if current_user.role != UserRole.ADMIN and current_user.id != farmer_user_id:
+        raise HTTPException(status_code=403, detail="Not allowed to order for this farmer")
+    
+    results = []
+    orders = []
+    
+    for index, line in enumerate(batch.items):
+        reserved = await session.execute(reserve_stock_statement(line.product_id, line.quantity))
+        price = reserved.scalar_one_or_none()
+        if price is None:
+            exists = await session.execute(select(Product.id).where(Product.id == line.product_id))
+            error = "Insufficient stock" if exists.scalar_one_or_none() else "Product not found"
+            results.append({"line": index, "product_id": line.product_id, "status": "failed", "error": error})
+            continue
+        
+        order = Order(
+            farmer_id=batch.farmer_id,
+            product_id=line.product_id,
+            quantity=line.quantity,
+            total_amount=float(price) * line.quantity,
+            delivery_address=batch.delivery_address,
+            stock_reserved=True
+        )
+        orders.append(order)
+        results.append({"line": index, "product_id": line.product_id, "status": "created", "order": order})
+    
+    failed = sum(1 for result in results if result["status"] == "failed")
+    if failed and batch.all_or_nothing:
+        await session.rollback()
+        for result in results:
+            if result.pop("order", None) is not None:
+                result["status"] = "not_placed"
+        return JSONResponse(
+            status_code=409,
+            content={"created": 0, "failed": failed, "results": results}
+        )
+    
+    session.add_all(orders)
+    await apply_orders(session, orders)
+    await session.commit()
+    for product_id in {order.product_id for order in orders}:
+        invalidate_catalog(product_id, stock_only=True)
+    
+    for result in results:
+        order = result.pop("order", None)
+        if order is not None:
+            result["order_id"] = order.id
+            result["total_amount"] = order.total_amount
+    
+    return {"created": len(orders), "failed": failed, "results": results}
+
+@router.put("/{order_id}/status", response_model=OrderRead)
+async def update_order_status(
+    order_id: int,
+    status_update: OrderStatusUpdate,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Move an order to a new status (buyer, selling dealer or admin)
+
+    Counters and the dealer's daily rollups move with it in the same
+    transaction; cancelling returns the stock of orders that reserved it.
+    """
+    result = await session.execute(order_parties_query(order_id))
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    order, buyer_id, seller_id = row
+    if current_user.role != UserRole.ADMIN and current_user.id not in (buyer_id, seller_id):
+        raise HTTPException(status_code=403, detail="Not allowed to update this order")
+    
+    if status_update.status == order.status:
+        return order
+    if order.status in FINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Order is already {order.status.value}")
+    if not await change_order_status(session, order, status_update.status):
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Order was updated concurrently, retry")
+    
+    restock = status_update.status == OrderStatus.CANCELLED and order.stock_reserved
+    if restock:
+        await session.execute(
+            update(Product)
+            .where(Product.id == order.product_id)
+            .values(stock_quantity=Product.stock_quantity + order.quantity)
+            .execution_options(synchronize_session=False)
+        )
+    elif status_update.status == OrderStatus.DELIVERED and order.delivery_date is None:
+        order.delivery_date = datetime.utcnow()
+    
+    await session.commit()
+    if restock:
+        invalidate_catalog(order.product_id, stock_only=True)
+    return order
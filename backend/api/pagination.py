@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from typing import List, Optional
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from schemas import schema_columns
+
+PAGINATION_HEADERS = ("X-Next-After", "Link")
+
+@dataclass
+class PageParams:
+    """Keyset pagination and projection parameters shared by all list endpoints"""
+    after: Optional[int]
+    limit: int
+    fields: Optional[List[str]]
+
+def page_params(
+    after: Optional[int] = Query(None, ge=0, description="Return rows with id greater than this cursor"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (capped by the server)"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+) -> PageParams:
+    """Parse paging query parameters, enforcing the server-side maximum page size"""
+    if limit is None:
+        limit = settings.default_page_size
+    limit = min(limit, settings.max_page_size)
+    field_list = None
+    if fields:
+        field_list = [name.strip() for name in fields.split(",") if name.strip()]
+    return PageParams(after=after, limit=limit, fields=field_list or None)
+
+def projected_columns(model, schema, fields: Optional[List[str]]):
+    """Map requested field names to table columns, always including the id cursor
+
+    Only fields of the response schema can be requested; without a field
+    list the schema's columns are selected.
+    """
+    if not fields:
+        return schema_columns(model, schema)
+    unknown = [name for name in fields if name not in schema.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    columns = model.__table__.columns
+    names = ["id"] + [name for name in dict.fromkeys(fields) if name != "id"]
+    return [columns[name] for name in names]
+
+def page_query(model, schema, params: PageParams, *criteria, order_by=None) -> Select:
+    """Build the keyset-paginated SELECT that paginate() runs
+
+    Rows are ordered by primary key and fetched ``WHERE id > after`` so every
+    page is an index range scan regardless of depth. With ``order_by``, rows
+    are ordered by (order_by, id) instead, for an index that leads with the
+    filter columns and then ``order_by``; the cursor stays an id and its
+    order_by value is looked up by primary key. One extra row is fetched to
+    know whether another page exists.
+    """
+    columns = projected_columns(model, schema, params.fields)
+    query = select(*columns)
+    if criteria:
+        query = query.where(*criteria)
+    if order_by is None:
+        if params.after is not None:
+            query = query.where(model.id > params.after)
+        query = query.order_by(model.id)
+    else:
+        if params.after is not None:
+            cursor = select(order_by).where(model.id == params.after).scalar_subquery()
+            query = query.where(tuple_(order_by, model.id) > tuple_(cursor, params.after))
+        query = query.order_by(order_by, model.id)
+    return query.limit(params.limit + 1)
+
+async def paginate(
+    session: AsyncSession,
+    model,
+    schema,
+    params: PageParams,
+    request: Request,
+    response: Response,
+    *criteria,
+    order_by=None,
+) -> List[dict]:
+    """Run page_query() for the ``schema`` columns of ``model``
+
+    The cursor for the next page is returned in the ``X-Next-After`` and
+    ``Link`` headers so the response body stays a plain list. Rows come back
+    as plain dicts, ready for page_response() to serialize without building
+    ORM objects.
+    """
+    result = await session.execute(page_query(model, schema, params, *criteria, order_by=order_by))
+    rows = [dict(row) for row in result.mappings().all()]
+
+    has_more = len(rows) > params.limit
+    rows = rows[:params.limit]
+    if has_more:
+        next_after = rows[-1]["id"]
+        next_url = request.url.include_query_params(after=next_after, limit=params.limit)
+        response.headers["X-Next-After"] = str(next_after)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return rows
+
+def page_response(rows: List[dict], response: Response) -> ORJSONResponse:
+    """Serialize a page of rows in one orjson pass, keeping the pagination headers
+
+    Returning a Response skips FastAPI's per-field response_model validation
+    and jsonable_encoder walk; the endpoint's response_model still documents
+    the row schema.
+    """
+    headers = {name: response.headers[name] for name in PAGINATION_HEADERS if name in response.headers}
+    return ORJSONResponse(rows, headers=headers)
@@ -1,57 +1,260 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from database import get_session
-from models import Product, ProductCategory
-from typing import Optional
+from sqlalchemy import Select, select, func, literal_column, table, column
+from database import get_session, get_write_session
+from api.pagination import PAGINATION_HEADERS, PageParams, page_params, paginate
+from api.auth import get_current_user
+from models import Product, ProductCategory, Dealer, User, UserRole
+from schemas import ProductRead, ProductCreate, ProductUpdate, schema_columns
+from cache import TTLCache, CachedResponse, conditional_response
+from config import settings
+from typing import List, Optional
 
 router = APIRouter()
 
-@router.get("/")
+CATALOG_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+# Serialized catalog responses. List pages are keyed by the catalog version,
+# which product writes bump unless they only move stock_quantity; single
+# products are invalidated directly, after every write. Orders move stock
+# constantly, so list pages show a product's stock as of when they were cached
+# (at most catalog_cache_ttl_seconds old).
+catalog_cache = TTLCache(
+    maxsize=settings.catalog_cache_max_entries,
+    ttl=settings.catalog_cache_ttl_seconds
+)
+catalog_version = 0
+# Bumped by every invalidation, stock-only ones included. A product read
+# that an invalidation overtook is served but not cached.
+catalog_writes = 0
+
+def invalidate_catalog(product_id: Optional[int] = None, stock_only: bool = False) -> None:
+    """Invalidate cached catalog pages after a product insert, update or delete
+
+    Pass stock_only when only stock_quantity changed; list pages are then
+    left to expire rather than all being re-rendered.
+    """
+    global catalog_version, catalog_writes
+    catalog_writes += 1
+    if not stock_only:
+        catalog_version += 1
+    if product_id is not None:
+        catalog_cache.invalidate(("product", product_id))
+
+async def list_products(
+    session: AsyncSession,
+    category: Optional[str],
+    page: PageParams,
+    request: Request,
+    response: Response
+):
+    """Query one page of products, optionally filtered by category"""
+    if category:
+        # Convert category to lowercase and map to enum
+        category_lower = category.lower()
+        if category_lower == "seeds":
+            category_enum = ProductCategory.SEEDS
+        elif category_lower == "fertilizers":
+            category_enum = ProductCategory.FERTILIZERS
+        elif category_lower == "drones":
+            category_enum = ProductCategory.DRONES
+        elif category_lower == "tractors":
+            category_enum = ProductCategory.TRACTORS
+        elif category_lower == "robots":
+            category_enum = ProductCategory.ROBOTS
+        elif category_lower == "machinery":
+            category_enum = ProductCategory.MACHINERY
+        else:
+            # Return empty list for unknown category
+            return []
+        
+        return await paginate(
+            session, Product, ProductRead, page, request, response,
+            Product.category == category_enum
+        )
+    
+    return await paginate(session, Product, ProductRead, page, request, response)
+
+@router.get("/", response_model=List[ProductRead])
 async def get_products(
+    request: Request,
     category: Optional[str] = Query(None, description="Filter by category"),
+    page: PageParams = Depends(page_params),
     session: AsyncSession = Depends(get_session)
 ):
     """Get all products, optionally filtered by category"""
-    try:
-        if category:
-            # Convert category to lowercase and map to enum
-            category_lower = category.lower()
-            if category_lower == "seeds":
-                category_enum = ProductCategory.SEEDS
-            elif category_lower == "fertilizers":
-                category_enum = ProductCategory.FERTILIZERS
-            elif category_lower == "drones":
-                category_enum = ProductCategory.DRONES
-            elif category_lower == "tractors":
-                category_enum = ProductCategory.TRACTORS
-            elif category_lower == "robots":
-                category_enum = ProductCategory.ROBOTS
-            elif category_lower == "machinery":
-                category_enum = ProductCategory.MACHINERY
-            else:
-                # Return empty list for unknown category
-                return []
-            
-            result = await session.execute(
-                select(Product).where(Product.category == category_enum)
-            )
-        else:
-            result = await session.execute(select(Product))
-        
-        products = result.scalars().all()
-        return products
-    except Exception as e:
-        # Return empty list for any errors
+    key = (
+        "list", catalog_version, category.lower() if category else None,
+        page.after, page.limit, tuple(page.fields or ())
+    )
+    cached = catalog_cache.get(key)
+    if cached is None:
+        page_response = Response()
+        try:
+            products = await list_products(session, category, page, request, page_response)
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Return empty list for any errors
+            return []
+        headers = {
+            name: page_response.headers[name]
+            for name in PAGINATION_HEADERS if name in page_response.headers
+        }
+        cached = CachedResponse.from_content(products, headers)
+        catalog_cache.set(key, cached)
+    return conditional_response(request, cached, CATALOG_CACHE_CONTROL)
+
+products_fts = table("products_fts", column("rowid"))
+
+def build_match_query(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 query of quoted prefix terms, all required"""
+    terms = [term.replace('"', "") for term in q.split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search_query(match: str, category: Optional[ProductCategory], offset: int, limit: int) -> Select:
+    """Products matching an FTS5 query, best matches first"""
+    # bm25() ranks lower-is-better; name matches weigh 10x description matches
+    rank = func.bm25(literal_column("products_fts"), 10.0, 1.0)
+    query = (
+        select(*schema_columns(Product, ProductRead))
+        .join(products_fts, products_fts.c.rowid == Product.id)
+        .where(literal_column("products_fts").op("MATCH")(match))
+    )
+    if category is not None:
+        query = query.where(Product.category == category)
+    return query.order_by(rank, Product.id).offset(offset).limit(limit)
+
+@router.get("/search", response_model=List[ProductRead])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text, matched as word prefixes"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    offset: int = Query(0, ge=0, le=10000),
+    limit: Optional[int] = Query(None, ge=1),
+    session: AsyncSession = Depends(get_session)
+):
+    """Full-text search over product names and descriptions, best matches first"""
+    match = build_match_query(q)
+    if match is None:
         return []
+    limit = min(limit or settings.default_page_size, settings.max_page_size)
+    category_enum = None
+    if category:
+        try:
+            category_enum = ProductCategory(category.lower())
+        except ValueError:
+            # Return empty list for unknown category
+            return []
+    
+    result = await session.execute(search_query(match, category_enum, offset, limit))
+    return ORJSONResponse([dict(row) for row in result.mappings().all()])
 
-@router.get("/{product_id}")
-async def get_product(product_id: int, session: AsyncSession = Depends(get_session)):
+@router.get("/{product_id}", response_model=ProductRead)
+async def get_product(
+    product_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_session)
+):
     """Get specific product by ID"""
+    key = ("product", product_id)
+    cached = catalog_cache.get(key)
+    if cached is None:
+        writes = catalog_writes
+        result = await session.execute(
+            select(Product).where(Product.id == product_id)
+        )
+        product = result.scalar_one_or_none()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        cached = CachedResponse.from_content(ProductRead.model_validate(product))
+        if catalog_writes == writes:
+            catalog_cache.set(key, cached)
+    return conditional_response(request, cached, CATALOG_CACHE_CONTROL)
+
+async def get_writable_dealer_id(
+    current_user: User,
+    session: AsyncSession,
+    requested_dealer_id: Optional[int] = None
+) -> Optional[int]:
+    """Resolve which dealer's products the current user may write"""
+    if current_user.role == UserRole.ADMIN:
+        return requested_dealer_id
+    if current_user.role != UserRole.DEALER:
+        raise HTTPException(status_code=403, detail="Dealer access required")
+    result = await session.execute(
+        select(Dealer.id).where(Dealer.user_id == current_user.id)
+    )
+    dealer_id = result.scalar_one_or_none()
+    if dealer_id is None:
+        raise HTTPException(status_code=403, detail="Dealer profile required")
+    return dealer_id
+
+async def get_owned_product(
+    product_id: int,
+    current_user: User,
+    session: AsyncSession
+) -> Product:
     result = await session.execute(
         select(Product).where(Product.id == product_id)
     )
     product = result.scalar_one_or_none()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product 
\ No newline at end of file
+    dealer_id = await get_writable_dealer_id(current_user, session, product.dealer_id)
+    if product.dealer_id != dealer_id:
+        raise HTTPException(status_code=403, detail="Not your product")
+    return product
+
+@router.post("/", response_model=ProductRead)
+async def create_product(
+    product_data: ProductCreate,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Create a new product for the current dealer"""
+    dealer_id = await get_writable_dealer_id(current_user, session, product_data.dealer_id)
+    if dealer_id is None:
+        raise HTTPException(status_code=400, detail="dealer_id is required")
+    
+    product = Product(**product_data.model_dump(exclude={"dealer_id"}), dealer_id=dealer_id)
+    session.add(product)
+    await session.commit()
+    await session.refresh(product)
+    invalidate_catalog(product.id)
+    return product
+
+@router.put("/{product_id}", response_model=ProductRead)
+async def update_product(
+    product_id: int,
+    product_data: ProductUpdate,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Update a product owned by the current dealer"""
+    product = await get_owned_product(product_id, current_user, session)
+    
+    changes = product_data.model_dump(exclude_unset=True)
+    for key, value in changes.items():
+        setattr(product, key, value)
+    
+    await session.commit()
+    await session.refresh(product)
+    invalidate_catalog(product.id, stock_only=changes.keys() <= {"stock_quantity"})
+    return product
+
+@router.delete("/{product_id}")
+async def delete_product(
+    product_id: int,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Delete a product owned by the current dealer"""
+    product = await get_owned_product(product_id, current_user, session)
+    await session.delete(product)
+    await session.commit()
+    invalidate_catalog(product_id)
+    return {"message": "Product deleted successfully"} 
\ No newline at end of file
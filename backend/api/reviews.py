@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Optional
+from database import get_session, get_write_session
+from api.pagination import PageParams, page_params, paginate, page_response
+from api.auth import get_current_user
+from aggregates import PROFILE_TABLES, apply_review
+from models import Review, User
+from schemas import ReviewRead
+
+router = APIRouter()
+
+class ReviewCreate(BaseModel):
+    reviewed_id: int
+    rating: int = Field(ge=1, le=5)
+    comment: Optional[str] = None
+
+@router.get("/", response_model=List[ReviewRead])
+async def get_reviews(
+    request: Request,
+    response: Response,
+    reviewed_id: Optional[int] = Query(None, description="Only reviews of this user"),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_session)
+):
+    """Get reviews, optionally for one reviewed user"""
+    criteria = [Review.reviewed_id == reviewed_id] if reviewed_id is not None else []
+    rows = await paginate(session, Review, ReviewRead, page, request, response, *criteria)
+    return page_response(rows, response)
+
+@router.post("/", response_model=ReviewRead)
+async def create_review(
+    review_data: ReviewCreate,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session)
+):
+    """Review a farmer, expert or dealer; updates their rating in the same transaction"""
+    if review_data.reviewed_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Cannot review yourself")
+    
+    result = await session.execute(select(User.role).where(User.id == review_data.reviewed_id))
+    role = result.scalar_one_or_none()
+    if role not in PROFILE_TABLES:
+        raise HTTPException(status_code=404, detail="Reviewed user not found")
+    
+    review = Review(reviewer_id=current_user.id, **review_data.model_dump())
+    session.add(review)
+    await apply_review(session, review, role)
+    await session.commit()
+    await session.refresh(review)
+    return review
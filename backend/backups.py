@@ -0,0 +1,197 @@
+"""
+Online, compressed SQLite backups
+
+create_backup() snapshots the live database with SQLite's online backup API
+in paged steps, so the API keeps reading and writing between steps, then
+streams the snapshot through gzip into a timestamped file. restore_backup()
+decompresses a backup, runs PRAGMA integrity_check on it and only then copies
+it over the live database. prune_backups() applies the retention policy.
+"""
+
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.engine import make_url
+from config import settings
+
+COPY_BUFFER = 1024 * 1024
+
+class BackupRestarted(Exception):
+    """The source kept changing under a paged backup"""
+
+@dataclass
+class BackupResult:
+    path: str
+    database_bytes: int
+    compressed_bytes: int
+    snapshot_seconds: float
+    compress_seconds: float
+    steps: int
+    restarts: int
+
+    @property
+    def ratio(self) -> float:
+        return self.compressed_bytes / max(self.database_bytes, 1)
+
+def database_path() -> str:
+    """Filesystem path of the SQLite database named by DATABASE_URL"""
+    return make_url(settings.database_url).database
+
+def backup_pattern(backup_dir: str) -> str:
+    return os.path.join(backup_dir, f"{settings.database_name}_backup_*.db.gz")
+
+def list_backups(backup_dir: Optional[str] = None) -> List[str]:
+    """Backups in backup_dir, newest first"""
+    return sorted(glob.glob(backup_pattern(backup_dir or settings.backup_dir)), reverse=True)
+
+def snapshot(source_path: str, target_path: str, pages_per_step: int, step_sleep: float, max_restarts: int):
+    """Copy source_path to target_path with the online backup API; returns (steps, restarts)
+
+    Each step copies pages_per_step pages under a short read lock and sleeps
+    step_sleep seconds in between, so writers are never held up for long. A
+    write from another connection restarts the copy at the next step (seen as
+    ``remaining`` failing to drop); under a steady write load that never
+    finishes, so after max_restarts the copy is redone in a single step.
+    """
+    steps = restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal steps, restarts, last_remaining
+        steps += 1
+        if last_remaining is not None and remaining >= last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise BackupRestarted()
+        last_remaining = remaining
+
+    source = sqlite3.connect(source_path)
+    try:
+        target = sqlite3.connect(target_path)
+        try:
+            try:
+                source.backup(target, pages=pages_per_step, progress=progress, sleep=step_sleep)
+            except BackupRestarted:
+                # One step holds a single read snapshot: in WAL mode writers
+                # carry on regardless, otherwise they wait for the copy
+                source.backup(target, pages=-1)
+                steps += 1
+        finally:
+            target.close()
+    finally:
+        source.close()
+    return steps, restarts
+
+def create_backup(
+    source_path: Optional[str] = None,
+    backup_dir: Optional[str] = None,
+    pages_per_step: Optional[int] = None,
+    step_sleep: Optional[float] = None,
+    compress_level: Optional[int] = None,
+) -> BackupResult:
+    """Snapshot the database and write it to <backup_dir>/<name>_backup_<timestamp>.db.gz"""
+    source_path = source_path or database_path()
+    backup_dir = backup_dir or settings.backup_dir
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Database file not found: {source_path}")
+    os.makedirs(backup_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(backup_dir, f"{settings.database_name}_backup_{timestamp}.db.gz")
+    fd, snapshot_path = tempfile.mkstemp(prefix=".snapshot-", suffix=".db", dir=backup_dir)
+    os.close(fd)
+    partial_path = f"{path}.partial"
+    try:
+        started = time.perf_counter()
+        steps, restarts = snapshot(
+            source_path, snapshot_path,
+            pages_per_step or settings.backup_pages_per_step,
+            settings.backup_step_sleep_ms / 1000 if step_sleep is None else step_sleep,
+            settings.backup_max_restarts,
+        )
+        snapshot_seconds = time.perf_counter() - started
+
+        # Stream the snapshot through gzip; the final name only appears once
+        # the file is complete, so a crash never leaves a truncated backup
+        started = time.perf_counter()
+        level = settings.backup_compress_level if compress_level is None else compress_level
+        with open(snapshot_path, "rb") as src, gzip.open(partial_path, "wb", compresslevel=level) as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+        os.replace(partial_path, path)
+        compress_seconds = time.perf_counter() - started
+
+        return BackupResult(
+            path=path,
+            database_bytes=os.path.getsize(snapshot_path),
+            compressed_bytes=os.path.getsize(path),
+            snapshot_seconds=snapshot_seconds,
+            compress_seconds=compress_seconds,
+            steps=steps,
+            restarts=restarts,
+        )
+    finally:
+        for leftover in (snapshot_path, partial_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+def integrity_errors(path: str) -> List[str]:
+    """Problems reported by PRAGMA integrity_check; empty when the database is sound"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+        if not conn.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]:
+            rows = ["database has no tables"]
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    finally:
+        conn.close()
+    return [] if rows == ["ok"] else rows
+
+def restore_backup(backup_path: str, target_path: Optional[str] = None) -> float:
+    """Verify a backup and copy it over the database; returns elapsed seconds
+
+    The backup is decompressed next to the database and checked with
+    PRAGMA integrity_check before anything is written. It is then copied in
+    with the backup API, which takes the database's write lock, so open
+    connections see either the old or the restored contents, never a mix.
+    """
+    target_path = target_path or database_path()
+    started = time.perf_counter()
+    fd, restored_path = tempfile.mkstemp(
+        prefix=".restore-", suffix=".db", dir=os.path.dirname(os.path.abspath(target_path))
+    )
+    os.close(fd)
+    try:
+        opener = gzip.open if backup_path.endswith(".gz") else open
+        with opener(backup_path, "rb") as src, open(restored_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+
+        errors = integrity_errors(restored_path)
+        if errors:
+            raise ValueError(f"Backup failed integrity check: {'; '.join(errors[:5])}")
+
+        source = sqlite3.connect(restored_path)
+        target = sqlite3.connect(target_path, timeout=settings.sqlite_busy_timeout_ms / 1000)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    finally:
+        os.remove(restored_path)
+    return time.perf_counter() - started
+
+def prune_backups(backup_dir: Optional[str] = None, keep: Optional[int] = None) -> List[str]:
+    """Delete all but the newest ``keep`` backups; returns the deleted paths"""
+    keep = settings.backup_keep_last if keep is None else keep
+    expired = list_backups(backup_dir)[max(keep, 1):]
+    for path in expired:
+        os.remove(path)
+    return expired
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQLite read/write throughput with and without the production engine profile
+
+Usage: python benchmarks/bench_engine_profile.py [--writers N] [--readers N] [--seconds S]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from database import create_engine_for_profile, PRODUCTION_PROFILE
+from models import SQLModel, Order
+
+async def run_profile(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    """Drive concurrent order inserts and reads against a fresh database file"""
+    workdir = tempfile.mkdtemp(prefix="bench_engine_")
+    url = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    engine = create_engine_for_profile(url, profile)
+    Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    stats = {"writes": 0, "reads": 0, "errors": 0}
+    deadline = time.perf_counter() + seconds
+
+    async def writer(worker_id: int):
+        while time.perf_counter() < deadline:
+            try:
+                async with Session() as session:
+                    session.add(Order(
+                        farmer_id=worker_id,
+                        product_id=1,
+                        quantity=1,
+                        total_amount=100.0,
+                        delivery_address="Benchmark Farm"
+                    ))
+                    await session.commit()
+                stats["writes"] += 1
+            except OperationalError:
+                stats["errors"] += 1
+
+    async def reader():
+        while time.perf_counter() < deadline:
+            try:
+                async with Session() as session:
+                    await session.execute(select(func.count()).select_from(Order))
+                    await session.execute(select(Order).order_by(Order.id.desc()).limit(20))
+                stats["reads"] += 1
+            except OperationalError:
+                stats["errors"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(writer(i) for i in range(writers)),
+        *(reader() for _ in range(readers))
+    )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    return {
+        "profile": profile,
+        "writes_per_sec": stats["writes"] / elapsed,
+        "reads_per_sec": stats["reads"] / elapsed,
+        "errors": stats["errors"],
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"📊 {args.writers} writers, {args.readers} readers, {args.seconds}s per profile")
+    for profile in ("default", PRODUCTION_PROFILE):
+        result = await run_profile(profile, args.writers, args.readers, args.seconds)
+        print(
+            f"  - {result['profile']:<10} "
+            f"writes/s={result['writes_per_sec']:>9.1f}  "
+            f"reads/s={result['reads_per_sec']:>9.1f}  "
+            f"errors={result['errors']}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
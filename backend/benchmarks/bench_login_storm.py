@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Login-storm benchmark: latency of unrelated endpoints while bcrypt logins run
+
+Boots the API in-process against a temporary SQLite database, fires
+concurrent logins and probes GET /health throughout, then reports the
+probe latency percentiles. Pass --inline to run bcrypt on the event loop
+as the API did before hashing moved to the worker pool.
+
+Usage: python benchmarks/bench_login_storm.py [--logins N] [--concurrency N] [--inline]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_login_'), 'bench.db')}"
+)
+os.environ.setdefault("DEBUG", "false")
+
+import httpx
+from database import init_db, AsyncSessionLocal
+from models import User, UserRole
+from api import auth
+from main import app
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def seed_users(count: int, password: str):
+    hashed = auth.get_password_hash(password)
+    async with AsyncSessionLocal() as session:
+        for i in range(count):
+            session.add(User(
+                email=f"storm{i}@example.com",
+                phone="9999999999",
+                name=f"Storm User {i}",
+                hashed_password=hashed,
+                role=UserRole.FARMER,
+                status="approved"
+            ))
+        await session.commit()
+
+async def probe(client, stop: asyncio.Event, interval: float, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+
+async def storm(client, logins: int, concurrency: int, users: int, password: str, statuses: dict):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(i: int):
+        async with semaphore:
+            response = await client.post(
+                "/api/auth/login",
+                params={"email": f"storm{i % users}@example.com", "password": password}
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(login(i) for i in range(logins)))
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    parser.add_argument("--inline", action="store_true", help="Hash on the event loop (previous behaviour)")
+    args = parser.parse_args()
+
+    if args.inline:
+        async def run_inline(func, *job_args):
+            return func(*job_args)
+        auth.run_password_job = run_inline
+
+    password = "storm-password"
+    await init_db()
+    await seed_users(args.users, password)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api.klipsmart.shop") as client:
+        baseline = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, args.probe_interval, baseline))
+        await asyncio.sleep(1.0)
+        stop.set()
+        await probe_task
+
+        during = []
+        statuses = {}
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, args.probe_interval, during))
+        started = time.perf_counter()
+        await storm(client, args.logins, args.concurrency, args.users, password, statuses)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe_task
+
+    mode = "inline (event loop)" if args.inline else f"worker pool ({auth.settings.password_hash_workers} threads)"
+    print(f"🔐 Login storm: {args.logins} logins, concurrency {args.concurrency}, bcrypt rounds {auth.settings.bcrypt_rounds}, {mode}")
+    print(f"  - Storm duration: {elapsed:.2f}s ({args.logins / elapsed:.1f} logins/s), statuses {statuses}")
+    for label, samples in (("idle", baseline), ("during storm", during)):
+        print(
+            f"  - /health {label:<13} n={len(samples):<5} "
+            f"p50={percentile(samples, 50):7.2f}ms  "
+            f"p95={percentile(samples, 95):7.2f}ms  "
+            f"p99={percentile(samples, 99):7.2f}ms"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
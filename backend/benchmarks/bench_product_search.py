@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark FTS5 product search against the LIKE full-scan alternative
+
+Seeds a temporary database with synthetic products, then times the same
+search terms through the products_fts index (as /api/products/search runs
+them) and through LIKE '%term%' over name and description.
+
+Usage: python benchmarks/bench_product_search.py [--products N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_search_'), 'bench.db')}"
+)
+os.environ.setdefault("DEBUG", "false")
+
+from sqlalchemy import func, insert, literal_column, or_, select
+from database import init_db, engine
+from models import Product, ProductCategory
+from api.products import build_match_query, products_fts
+
+WORDS = (
+    "drone spray tractor harvester seed hybrid wheat rice cotton tomato organic "
+    "fertilizer urea potash nitrogen irrigation drip pump sprinkler robot weeder "
+    "planter tiller rotavator battery solar sensor soil moisture yield pest "
+    "fungicide compact heavy duty precision autonomous gps mapping lidar camera"
+).split()
+SEARCH_TERMS = ["drone", "organic fertilizer", "solar pump", "precis", "hybrid cotton seed", "lidar mapping"]
+
+def filler_vocabulary(rng: random.Random, size: int = 5000) -> list:
+    """Pronounceable filler words so domain terms stay selective, as in a real catalog"""
+    consonants, vowels = "bcdfghjklmnprstvz", "aeiou"
+    return [
+        "".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 4)))
+        for _ in range(size)
+    ]
+
+def random_text(rng: random.Random, filler: list, words: int) -> str:
+    return " ".join(
+        rng.choice(WORDS) if rng.random() < 0.05 else rng.choice(filler)
+        for _ in range(words)
+    )
+
+async def seed_products(count: int):
+    rng = random.Random(42)
+    filler = filler_vocabulary(rng)
+    categories = list(ProductCategory)
+    batch = []
+    async with engine.begin() as conn:
+        for i in range(count):
+            batch.append({
+                "name": random_text(rng, filler, 3).title(),
+                "description": random_text(rng, filler, 25),
+                "category": rng.choice(categories),
+                "price": round(rng.uniform(100, 500000), 2),
+                "dealer_id": rng.randint(1, 100),
+                "stock_quantity": rng.randint(0, 500),
+            })
+            if len(batch) == 5000:
+                await conn.execute(insert(Product), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(Product), batch)
+
+def fts_query(term: str, limit: int):
+    return (
+        select(Product)
+        .join(products_fts, products_fts.c.rowid == Product.id)
+        .where(literal_column("products_fts").op("MATCH")(build_match_query(term)))
+        .order_by(func.bm25(literal_column("products_fts"), 10.0, 1.0), Product.id)
+        .limit(limit)
+    )
+
+def like_query(term: str, limit: int):
+    criteria = [
+        or_(Product.name.ilike(f"%{word}%"), Product.description.ilike(f"%{word}%"))
+        for word in term.split()
+    ]
+    return select(Product).where(*criteria).order_by(Product.id).limit(limit)
+
+async def time_queries(build, repeat: int, limit: int) -> float:
+    async with engine.connect() as conn:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for term in SEARCH_TERMS:
+                result = await conn.execute(build(term, limit))
+                result.fetchall()
+        elapsed = time.perf_counter() - started
+    return elapsed / (repeat * len(SEARCH_TERMS)) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    await init_db()
+    started = time.perf_counter()
+    await seed_products(args.products)
+    print(f"🌱 Seeded {args.products:,} products in {time.perf_counter() - started:.1f}s")
+
+    fts_ms = await time_queries(fts_query, args.repeat, args.limit)
+    like_ms = await time_queries(like_query, args.repeat, args.limit)
+    print(f"🔎 Mean latency over {len(SEARCH_TERMS)} terms x {args.repeat} runs (limit {args.limit}):")
+    print(f"  - FTS5 + bm25:     {fts_ms:8.2f} ms")
+    print(f"  - LIKE full scan:  {like_ms:8.2f} ms")
+    print(f"  - Speed-up:        {like_ms / fts_ms:8.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark list-response serialization for 10k-row product and order pages
+
+Seeds a temporary database, then times three ways of turning one large page
+into JSON bytes, split into fetch and serialize time:
+
+  - ORM objects through jsonable_encoder + json.dumps (the previous path)
+  - ORM objects through a typed response_model, then orjson
+  - Schema columns fetched as plain rows, then orjson (the current path)
+
+Usage: python benchmarks/bench_serialization.py [--rows N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_json_'), 'bench.db')}"
+)
+os.environ.setdefault("DEBUG", "false")
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import insert, select
+from database import init_db, engine, AsyncSessionLocal
+from models import Product, ProductCategory, Order, OrderStatus
+from schemas import ProductRead, OrderRead, schema_columns
+
+async def seed(rows: int):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(insert(Product), [
+            {
+                "name": f"Product {i}",
+                "description": f"Synthetic product {i} for serialization benchmarks",
+                "category": rng.choice(list(ProductCategory)),
+                "price": round(rng.uniform(100, 500000), 2),
+                "dealer_id": rng.randint(1, 100),
+                "stock_quantity": rng.randint(0, 500),
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        await conn.execute(insert(Order), [
+            {
+                "farmer_id": rng.randint(1, 1000),
+                "product_id": rng.randint(1, rows),
+                "quantity": rng.randint(1, 10),
+                "total_amount": round(rng.uniform(100, 50000), 2),
+                "status": rng.choice(list(OrderStatus)),
+                "delivery_address": f"{rng.randint(1, 999)} Farm Road",
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+
+async def fetch_orm(model, rows: int):
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(model).order_by(model.id).limit(rows))
+        return list(result.scalars().all())
+
+async def fetch_columns(model, schema, rows: int):
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(*schema_columns(model, schema)).order_by(model.id).limit(rows)
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+async def encode_jsonable(content, field):
+    return json.dumps(jsonable_encoder(content)).encode("utf-8")
+
+async def encode_response_model(content, field):
+    return orjson.dumps(await serialize_response(field=field, response_content=content, is_coroutine=True))
+
+async def encode_orjson(content, field):
+    return orjson.dumps(content)
+
+async def time_path(fetch, encode, field, repeat: int):
+    fetch_total = encode_total = 0.0
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        content = await fetch()
+        fetched = time.perf_counter()
+        body = await encode(content, field)
+        fetch_total += fetched - started
+        encode_total += time.perf_counter() - fetched
+        size = len(body)
+    return fetch_total / repeat * 1000, encode_total / repeat * 1000, size
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    await init_db()
+    await seed(args.rows)
+    print(f"🌱 Seeded {args.rows:,} products and {args.rows:,} orders")
+
+    for model, schema in ((Product, ProductRead), (Order, OrderRead)):
+        field = create_response_field(name="response", type_=List[schema])
+        paths = (
+            ("ORM + jsonable_encoder", lambda: fetch_orm(model, args.rows), encode_jsonable),
+            ("ORM + response_model + orjson", lambda: fetch_orm(model, args.rows), encode_response_model),
+            ("columns + orjson", lambda: fetch_columns(model, schema, args.rows), encode_orjson),
+        )
+        print(f"📦 {model.__tablename__}: {args.rows:,} rows, mean of {args.repeat} runs")
+        baseline = None
+        for label, fetch, encode in paths:
+            fetch_ms, encode_ms, size = await time_path(fetch, encode, field, args.repeat)
+            total = fetch_ms + encode_ms
+            baseline = baseline or total
+            print(
+                f"  - {label:<30} fetch {fetch_ms:7.1f} ms  serialize {encode_ms:7.1f} ms  "
+                f"total {total:7.1f} ms  ({baseline / total:4.1f}x, {size / 1024:,.0f} KiB)"
+            )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Mixed-traffic load test of the API, booted in-process against seeded SQLite
+
+Seeds a temporary database (farmers, dealers, products, pending sign-ups),
+then runs --concurrency virtual users for --duration seconds. Each user
+repeatedly picks a scenario by weight: logins, catalog browsing, product
+detail, search, batch order placement and admin approvals. Latency is
+recorded per route template and written as a JSON artifact with throughput
+and p50/p95/p99 per route, so two runs (e.g. before and after a change to
+backend/api) can be compared with --compare.
+
+The client shares the event loop with the app, so absolute numbers are
+lower than a real deployment; runs are meant to be compared with each other
+on the same machine.
+
+Usage: python benchmarks/loadtest.py [--concurrency N] [--duration S]
+           [--mix login=5,catalog=45,...] [--output FILE] [--compare BASELINE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='loadtest_'), 'loadtest.db')}"
+)
+os.environ.setdefault("DEBUG", "false")
+# Keep the access log and slow-query log from dominating the measurement
+os.environ.setdefault("LOG_LEVEL", "warning")
+os.environ.setdefault("SLOW_QUERY_MS", "1000")
+
+import httpx
+from sqlalchemy import insert
+from config import settings
+from database import init_db, engine
+from models import User, UserRole, Farmer, Dealer, Product, ProductCategory
+from api import auth
+from main import app
+
+PASSWORD = "loadtest-password"
+SEARCH_TERMS = ["drone", "seed", "organic", "pump", "tractor", "hybrid wheat", "spray"]
+DEFAULT_MIX = "login=5,catalog=45,product=20,search=10,order=15,approve=5"
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight)
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+async def seed(rng: random.Random, farmers: int, dealers: int, products: int, pending: int) -> dict:
+    """Insert the data set with Core executemany; returns ids the scenarios draw from"""
+    hashed = auth.get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    users = [{
+        "email": "admin@loadtest.local", "phone": "9000000000", "name": "Load Admin",
+        "hashed_password": hashed, "role": UserRole.ADMIN, "status": "approved",
+    }]
+    users += [{
+        "email": f"farmer{i}@loadtest.local", "phone": "9000000001", "name": f"Farmer {i}",
+        "hashed_password": hashed, "role": UserRole.FARMER, "status": "approved",
+    } for i in range(farmers)]
+    users += [{
+        "email": f"dealer{i}@loadtest.local", "phone": "9000000002", "name": f"Dealer {i}",
+        "hashed_password": hashed, "role": UserRole.DEALER, "status": "approved",
+    } for i in range(dealers)]
+    users += [{
+        "email": f"pending{i}@loadtest.local", "phone": "9000000003", "name": f"Pending {i}",
+        "hashed_password": hashed, "role": UserRole.FARMER, "status": "pending",
+        "created_at": now - timedelta(minutes=i),
+    } for i in range(pending)]
+    for user in users:
+        user.setdefault("created_at", now)
+        user["updated_at"] = now
+
+    words = SEARCH_TERMS + ["compact", "heavy", "duty", "solar", "precision", "battery", "kit"]
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), users)
+        await conn.execute(insert(Farmer), [{
+            "user_id": 2 + i, "email": f"farmer{i}@loadtest.local", "phone": "9000000001",
+            "name": f"Farmer {i}", "location": rng.choice(["Punjab", "Kerala", "Gujarat", "Bihar"]),
+        } for i in range(farmers)])
+        await conn.execute(insert(Dealer), [{
+            "user_id": 2 + farmers + i, "email": f"dealer{i}@loadtest.local", "phone": "9000000002",
+            "name": f"Dealer {i}", "company_name": f"Agro Supply {i}", "business_type": "retail",
+        } for i in range(dealers)])
+        await conn.execute(insert(Product), [{
+            "name": " ".join(rng.sample(words, 3)).title(),
+            "description": " ".join(rng.choice(words) for _ in range(20)),
+            "category": rng.choice(list(ProductCategory)),
+            "price": round(rng.uniform(100, 200000), 2),
+            "dealer_id": rng.randint(1, dealers),
+            # Deep stock so order placement is not starved mid-run
+            "stock_quantity": 1_000_000,
+            "created_at": now,
+        } for _ in range(products)])
+    return {
+        "farmers": farmers,
+        "products": products,
+        "pending_ids": list(range(2 + farmers + dealers, 2 + farmers + dealers + pending)),
+    }
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.measuring = False
+
+    async def request(self, client, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            response, failed = None, True
+        if self.measuring:
+            self.samples.setdefault(route, []).append((time.perf_counter() - started) * 1000)
+            if failed:
+                self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+# Scenarios: each issues one or more requests as a single virtual user action
+
+async def scenario_login(client, rec: Recorder, rng: random.Random, data: dict, admin_headers: dict):
+    await rec.request(
+        client, "POST /api/auth/login", "POST", "/api/auth/login",
+        params={"email": f"farmer{rng.randrange(data['farmers'])}@loadtest.local", "password": PASSWORD}
+    )
+
+async def scenario_catalog(client, rec: Recorder, rng: random.Random, data: dict, admin_headers: dict):
+    params = {"limit": 50}
+    if rng.random() < 0.5:
+        params["category"] = rng.choice(list(ProductCategory)).value
+    if rng.random() < 0.5:
+        params["after"] = rng.randrange(max(1, data["products"] - 50))
+    await rec.request(client, "GET /api/products/", "GET", "/api/products/", params=params)
+
+async def scenario_product(client, rec: Recorder, rng: random.Random, data: dict, admin_headers: dict):
+    product_id = rng.randint(1, data["products"])
+    await rec.request(client, "GET /api/products/{product_id}", "GET", f"/api/products/{product_id}")
+
+async def scenario_search(client, rec: Recorder, rng: random.Random, data: dict, admin_headers: dict):
+    await rec.request(
+        client, "GET /api/products/search", "GET", "/api/products/search",
+        params={"q": rng.choice(SEARCH_TERMS), "limit": 20}
+    )
+
+async def scenario_order(client, rec: Recorder, rng: random.Random, data: dict, admin_headers: dict):
+    items = [
+        {"product_id": rng.randint(1, data["products"]), "quantity": rng.randint(1, 3)}
+        for _ in range(rng.randint(1, 5))
+    ]
+    await rec.request(
+        client, "POST /api/orders/batch", "POST", "/api/orders/batch",
+        json={"farmer_id": rng.randint(1, data["farmers"]), "delivery_address": "Farm Road", "items": items}
+    )
+
+async def scenario_approve(client, rec: Recorder, rng: random.Random, data: dict, admin_headers: dict):
+    await rec.request(
+        client, "GET /api/admin/users/pending", "GET", "/api/admin/users/pending",
+        headers=admin_headers
+    )
+    if data["pending_ids"]:
+        user_id = data["pending_ids"].pop()
+        await rec.request(
+            client, "PUT /api/admin/users/{user_id}/approve", "PUT",
+            f"/api/admin/users/{user_id}/approve", headers=admin_headers
+        )
+
+SCENARIOS = {
+    "login": scenario_login,
+    "catalog": scenario_catalog,
+    "product": scenario_product,
+    "search": scenario_search,
+    "order": scenario_order,
+    "approve": scenario_approve,
+}
+
+async def virtual_user(client, rec: Recorder, rng: random.Random, mix: dict, data: dict,
+                       admin_headers: dict, deadline: float):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        scenario = SCENARIOS[rng.choices(names, weights)[0]]
+        await scenario(client, rec, rng, data, admin_headers)
+
+def summarize(rec: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route, samples in sorted(rec.samples.items()):
+        routes[route] = {
+            "requests": len(samples),
+            "errors": rec.errors.get(route, 0),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(sum(samples) / len(samples), 3),
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "p99_ms": round(percentile(samples, 99), 3),
+            "max_ms": round(max(samples), 3),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    every = [sample for samples in rec.samples.values() for sample in samples]
+    return {
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "errors": sum(rec.errors.values()),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(every, 50), 3),
+        "p95_ms": round(percentile(every, 95), 3),
+        "p99_ms": round(percentile(every, 99), 3),
+        "routes": routes,
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(result: dict):
+    summary = result["summary"]
+    print(
+        f"📊 {summary['requests']:,} requests in {summary['duration_s']:.1f}s "
+        f"({summary['throughput_rps']:.1f} req/s), {summary['errors']} errors, "
+        f"p50={summary['p50_ms']:.1f}ms p95={summary['p95_ms']:.1f}ms p99={summary['p99_ms']:.1f}ms"
+    )
+    for route, stats in summary["routes"].items():
+        print(
+            f"  - {route:<42} n={stats['requests']:<6} err={stats['errors']:<4} "
+            f"{stats['throughput_rps']:7.1f} rps  p50={stats['p50_ms']:7.1f}  "
+            f"p95={stats['p95_ms']:7.1f}  p99={stats['p99_ms']:7.1f} ms"
+        )
+
+def print_comparison(result: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"⚖️  Compared with {baseline_path} (commit {baseline['meta'].get('git_commit')}):")
+    before_routes = baseline["summary"]["routes"]
+    rows = [("overall", baseline["summary"], result["summary"])]
+    rows += [(route, before_routes[route], stats)
+             for route, stats in result["summary"]["routes"].items() if route in before_routes]
+    for label, before, after in rows:
+        print(
+            f"  - {label:<42} rps {before['throughput_rps']:7.1f} -> {after['throughput_rps']:7.1f}  "
+            f"p95 {before['p95_ms']:7.1f} -> {after['p95_ms']:7.1f} ms  "
+            f"p99 {before['p99_ms']:7.1f} -> {after['p99_ms']:7.1f} ms"
+        )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Scenario weights, name=weight,...")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for data and traffic")
+    parser.add_argument("--farmers", type=int, default=500)
+    parser.add_argument("--dealers", type=int, default=50)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--pending", type=int, default=2000, help="Sign-ups awaiting approval")
+    parser.add_argument("--output", default=None, help="JSON artifact path (default: loadtest-<time>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier artifact to compare against")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    await init_db()
+    started = time.perf_counter()
+    data = await seed(rng, args.farmers, args.dealers, args.products, args.pending)
+    print(f"🌱 Seeded {args.farmers} farmers, {args.dealers} dealers, {args.products} products, "
+          f"{args.pending} pending users in {time.perf_counter() - started:.1f}s")
+
+    admin_headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'admin@loadtest.local'})}"}
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    # Unhandled server errors become 500 responses, counted as errors
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api.klipsmart.shop",
+                                 limits=limits, timeout=60.0) as client:
+        print(f"🚦 {args.concurrency} virtual users, mix {mix}, warm-up {args.warmup:.0f}s, measuring {args.duration:.0f}s")
+        warmup_end = time.perf_counter() + args.warmup
+        deadline = warmup_end + args.duration
+        users = [
+            asyncio.create_task(virtual_user(
+                client, rec, random.Random(args.seed * 1000 + i), mix, data, admin_headers, deadline
+            ))
+            for i in range(args.concurrency)
+        ]
+        await asyncio.sleep(max(0.0, warmup_end - time.perf_counter()))
+        rec.measuring = True
+        measure_start = time.perf_counter()
+        await asyncio.gather(*users)
+        elapsed = time.perf_counter() - measure_start
+
+    result = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": mix,
+            "seed": args.seed,
+            "dataset": {
+                "farmers": args.farmers, "dealers": args.dealers,
+                "products": args.products, "pending": args.pending,
+            },
+            "settings": {
+                "db_engine_profile": settings.db_engine_profile,
+                "db_pool_size": settings.db_pool_size,
+                "bcrypt_rounds": settings.bcrypt_rounds,
+                "password_hash_workers": settings.password_hash_workers,
+            },
+        },
+        "summary": summarize(rec, elapsed),
+    }
+    output = args.output or f"loadtest-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print_report(result)
+    print(f"💾 Wrote {output}")
+    if args.compare:
+        print_comparison(result, args.compare)
+
+if __name__ == "__main__":
+    asyncio.run(main())
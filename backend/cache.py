@@ -0,0 +1,121 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from fastapi import Request, Response
+import orjson
+from fastapi.encoders import jsonable_encoder
+from compression import compress, negotiate_encoding, supported_encodings, variant_etag
+from config import settings
+
+class TTLCache:
+    """Bounded in-process cache with per-entry expiry and LRU eviction
+
+    Not thread-safe; intended for use from a single event loop, where no
+    operation awaits between reading and updating the underlying dict.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class CachedResponse:
+    """A serialized JSON response body with its strong ETag and extra headers
+
+    Compressed variants are produced on first request for each encoding and
+    kept alongside the body, so hits never pay for compression again.
+    """
+
+    def __init__(self, body: bytes, headers: Optional[dict] = None):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.headers = headers or {}
+        self._encoded = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compress(self.body, encoding, static=True)
+        return self._encoded[encoding]
+
+    def etags(self) -> set:
+        """The ETag of every representation of this body"""
+        return {self.etag} | {variant_etag(self.etag, encoding) for encoding in supported_encodings()}
+
+    @classmethod
+    def from_content(cls, content: Any, headers: Optional[dict] = None) -> "CachedResponse":
+        # orjson encodes dicts, lists, datetimes and Enums natively; anything
+        # else (e.g. response schema instances) goes through jsonable_encoder
+        body = orjson.dumps(content, default=jsonable_encoder)
+        return cls(body, headers)
+
+def etag_matches(if_none_match: Optional[str], etags: set) -> bool:
+    """Weak comparison of an If-None-Match header against known ETags (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") in etags for tag in candidates)
+
+def conditional_response(request: Request, cached: CachedResponse, cache_control: str) -> Response:
+    """Serve a cached body (precompressed when accepted), or an empty 304 when the client already holds it"""
+    encoding = None
+    if len(cached.body) >= settings.compression_minimum_size:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": variant_etag(cached.etag, encoding) if encoding else cached.etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+        **cached.headers,
+    }
+    if etag_matches(request.headers.get("if-none-match"), cached.etags()):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=cached.encoded(encoding), media_type="application/json", headers=headers)
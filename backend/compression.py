@@ -0,0 +1,164 @@
+import gzip
+import zlib
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported Content-Encoding from an Accept-Encoding header"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in supported_encodings():
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress a whole body; static bodies are compressed once and cached, so use max levels"""
+    if encoding == "br":
+        quality = settings.compression_static_brotli_quality if static else settings.compression_brotli_quality
+        return brotli.compress(body, quality=quality)
+    level = settings.compression_static_gzip_level if static else settings.compression_gzip_level
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """Strong ETags must differ per representation, so tag each encoded variant"""
+    if etag.startswith('"') and etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+class StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.compression_brotli_quality)
+            self._flush = lambda: self._compressor.finish()
+            self._write = self._compressor.process
+        else:
+            # wbits=31 emits a gzip container
+            self._compressor = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 31)
+            self._flush = self._compressor.flush
+            self._write = self._compressor.compress
+
+    def write(self, data: bytes) -> bytes:
+        return self._write(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+class CompressionMiddleware:
+    """gzip/brotli response compression negotiated from Accept-Encoding
+
+    Responses below minimum_size, non-text content types, and responses that
+    already carry a Content-Encoding (such as precompressed cache entries)
+    are passed through untouched. Streaming responses are compressed
+    incrementally.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+class CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[StreamCompressor] = None
+
+    def _prepare_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers:
+            headers["ETag"] = variant_etag(headers["etag"], self.encoding)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not more_body:
+                # Whole body in one message: compress only if it is worth it
+                if len(body) < self.minimum_size:
+                    self.passthrough = True
+                    await self._send(start)
+                    await self._send(message)
+                    return
+                body = compress(body, self.encoding)
+                self._prepare_headers(headers)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            self.compressor = StreamCompressor(self.encoding)
+            self._prepare_headers(headers)
+            del headers["Content-Length"]
+            await self._send(start)
+
+        chunk = self.compressor.write(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Optional, List, Dict
 import os
 
 class Settings(BaseSettings):
@@ -7,11 +7,35 @@ class Settings(BaseSettings):
     database_url: str = "sqlite+aiosqlite:////app/agri_platform.db"
     database_name: str = "agri_platform"
     
+    # Engine profile: "production" applies the SQLite pragmas and pool sizing
+    # below on every new connection, "default" keeps the driver defaults
+    db_engine_profile: str = "production"
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536  # 64MB page cache per connection
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # 256MB
+    sqlite_temp_store: str = "MEMORY"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    
     # Security settings
     secret_key: str = "your-secret-key-change-this-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Password hashing: bcrypt cost factor and the bounded worker pool that
+    # keeps hashing off the event loop (requests beyond the queue get a 503)
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 32
+    
+    # Authenticated principal cache (per worker process)
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_max_entries: int = 10000
+    
     # Server settings
     host: str = "0.0.0.0"
     port: int = 8000
@@ -43,8 +67,65 @@ class Settings(BaseSettings):
     upload_dir: str = "uploads"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     
+    # Product catalog response cache (per worker process)
+    catalog_cache_ttl_seconds: int = 60
+    catalog_cache_max_entries: int = 1024
+    
+    # Response compression (brotli is used when the package is installed).
+    # Static levels apply to cached bodies, which are compressed only once,
+    # but on the event loop at every cache miss: brotli 10-11 costs 15-50x
+    # more CPU than 8 for ~5% smaller output, so stay at 8.
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_static_gzip_level: int = 9
+    compression_static_brotli_quality: int = 8
+    
+    # Pagination settings
+    default_page_size: int = 50
+    max_page_size: int = 200
+    
+    # Admin batch approve/reject: users per UPDATE (and per transaction) and
+    # per request
+    admin_batch_chunk_size: int = 500
+    admin_batch_max_users: int = 10000
+    
+    # Dealer dashboard date ranges (days)
+    dealer_dashboard_default_days: int = 30
+    dealer_dashboard_max_days: int = 366
+    
     # Logging settings
     log_level: str = "info"
+    # Fraction of requests access-logged per route template; errors and slow
+    # requests are always logged
+    access_log_sample_rates: Dict[str, float] = {"/health": 0.01, "/": 0.1, "/metrics": 0.01}
+    access_log_slow_request_ms: float = 1000.0
+    
+    # Metrics settings (Prometheus /metrics endpoint). The endpoint has no
+    # auth and exposes route names, timings and error counts, so it is only
+    # mounted when enabled; keep it off on publicly reachable instances
+    # unless the path is blocked at the proxy.
+    metrics_enabled: bool = False
+    event_loop_lag_interval_seconds: float = 0.5
+    
+    # Query instrumentation: statements slower than slow_query_ms are logged;
+    # a request repeating one SELECT shape n_plus_one_threshold times is
+    # flagged as a likely N+1. Parameters hold password hashes, emails and
+    # phone numbers, so only log them while debugging.
+    slow_query_ms: float = 200.0
+    slow_query_log_parameters: bool = False
+    n_plus_one_threshold: int = 10
+    server_timing_enabled: bool = True
+    
+    # Backups (manage_db.py backup/restore): the online backup copies
+    # backup_pages_per_step pages per step and sleeps between steps so writers
+    # get the lock; only the newest backup_keep_last backups are kept
+    backup_dir: str = "backups"
+    backup_pages_per_step: int = 4096
+    backup_step_sleep_ms: float = 20.0
+    backup_max_restarts: int = 5
+    backup_compress_level: int = 6
+    backup_keep_last: int = 14
     
     class Config:
         env_file = ".env"
@@ -1,16 +1,123 @@
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateColumn
 from models import SQLModel
 from config import settings
+from metrics import observe_query, observe_query_error
+from observability import current_query_stats, log_slow_query
+
+PRODUCTION_PROFILE = "production"
+
+def sqlite_pragmas() -> dict:
+    """Connect-time pragmas applied by the production engine profile"""
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        # Negative cache_size is interpreted by SQLite as KiB instead of pages
+        "cache_size": -settings.sqlite_cache_size_kib,
+        "mmap_size": settings.sqlite_mmap_size,
+        "temp_store": settings.sqlite_temp_store,
+    }
+
+def create_engine_for_profile(database_url: str, profile: str, echo: bool = False) -> AsyncEngine:
+    """Create an async engine, tuned for concurrent access when profile is "production"
+
+    WAL lets readers proceed while a writer holds the lock and busy_timeout
+    makes writers queue instead of failing with "database is locked". That
+    alone does not make read-then-write endpoints safe: pysqlite only sends
+    BEGIN before the first INSERT/UPDATE/DELETE, so earlier reads see no
+    snapshot and a deferred transaction that did read cannot wait out a
+    writer that got in first. Connections with the execution option
+    sqlite_begin="IMMEDIATE" (see AsyncWriteSessionLocal) open their
+    transactions with BEGIN IMMEDIATE before the first statement, so the write
+    lock is waited for up front and everything the request reads is part of
+    the transaction it writes in.
+    """
+    is_sqlite = database_url.startswith("sqlite")
+    if profile != PRODUCTION_PROFILE:
+        return create_async_engine(database_url, echo=echo, future=True)
+
+    options = {}
+    if ":memory:" not in database_url:
+        # aiosqlite defaults to NullPool for files, reconnecting (and re-running
+        # the pragmas) per session; keep a sized pool of warm connections instead.
+        # In-memory SQLite uses a StaticPool, which takes no sizing options.
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+        )
+    if is_sqlite:
+        options["connect_args"] = {"timeout": settings.sqlite_busy_timeout_ms / 1000}
+
+    tuned_engine = create_async_engine(database_url, echo=echo, future=True, **options)
+
+    if is_sqlite:
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(tuned_engine.sync_engine, "connect")
+        def apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+        @event.listens_for(tuned_engine.sync_engine, "begin")
+        def begin_sqlite_transaction(conn):
+            # pysqlite only emits its implicit BEGIN when no transaction is
+            # open, so an explicit one issued here takes its place
+            if conn.get_execution_options().get("sqlite_begin") == "IMMEDIATE":
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return tuned_engine
+
+def instrument_engine(async_engine: AsyncEngine) -> None:
+    """Time every statement through cursor execution hooks
+
+    Feeds the query metrics, attributes each statement to the current
+    request's QueryStats, and logs statements slower than slow_query_ms.
+    """
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        # Stacked so re-entrant executes on one connection still pair up
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        observe_query(statement, duration)
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if duration * 1000 >= settings.slow_query_ms:
+            log_slow_query(statement, parameters, duration, settings.slow_query_log_parameters)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def discard_query_timer(exception_context):
+        if exception_context.statement is None:
+            return  # connection-level failure, not a statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+        observe_query_error(exception_context.statement)
 
 # Create async engine
-engine = create_async_engine(
+engine = create_engine_for_profile(
     settings.database_url,
-    echo=settings.debug,
-    future=True
+    settings.db_engine_profile,
+    echo=settings.debug
 )
+instrument_engine(engine)
 
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
@@ -19,21 +126,144 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Sessions for endpoints that write: their transactions take the SQLite write
+# lock before the first statement, reads included
+AsyncWriteSessionLocal = sessionmaker(
+    engine.execution_options(sqlite_begin="IMMEDIATE"),
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+def create_missing_indexes(sync_conn) -> list:
+    """Create any model index missing from an existing database
+
+    create_all() skips tables that already exist, including their indexes,
+    so databases created before an index was declared never receive it.
+    """
+    existing = {
+        row[0] for row in sync_conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type='index'")
+        )
+    }
+    created = []
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(sync_conn, checkfirst=True)
+                created.append(index.name)
+    return created
+
+def add_missing_columns(sync_conn) -> list:
+    """Add model columns missing from existing tables
+
+    create_all() never alters existing tables. SQLite can only ADD COLUMN, and
+    only when the column is nullable or has a server default, so new columns
+    must be declared that way.
+    """
+    added = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {row[1] for row in sync_conn.execute(text(f"PRAGMA table_info({table.name})"))}
+        for column in table.columns:
+            addable = column.nullable or column.server_default is not None
+            if existing and column.name not in existing and addable:
+                ddl = CreateColumn(column).compile(dialect=sync_conn.dialect)
+                sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+PRODUCT_SEARCH_DDL = [
+    # External-content FTS5 index: stores only the inverted index, reading
+    # row text back from the products table
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+def create_product_search_index(sync_conn) -> bool:
+    """Create the products full-text index and its sync triggers
+
+    Returns True when the index was newly created and back-filled from the
+    existing products.
+    """
+    exists = sync_conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'")
+    ).first()
+    for statement in PRODUCT_SEARCH_DDL:
+        sync_conn.execute(text(statement))
+    if not exists:
+        sync_conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+    return not exists
+
 async def init_db():
     """Initialize database tables"""
     async with engine.begin() as conn:
         # Create all tables
         await conn.run_sync(SQLModel.metadata.create_all)
         
+        # Backfill columns and indexes added since the database was created
+        added_columns = await conn.run_sync(add_missing_columns)
+        if added_columns:
+            print(f"Added missing columns: {added_columns}")
+        
+        created_indexes = await conn.run_sync(create_missing_indexes)
+        if created_indexes:
+            await conn.execute(text("ANALYZE"))
+            print(f"Created missing indexes: {created_indexes}")
+        
+        # Full-text search index over product names and descriptions
+        if await conn.run_sync(create_product_search_index):
+            print("Created product search index")
+        
         # Verify tables were created
         result = await conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))
         tables = result.fetchall()
         print(f"Database tables created successfully! Found tables: {[table[0] for table in tables]}")
 
 async def get_session() -> AsyncSession:
-    """Get database session"""
+    """Get database session
+
+    Statements run on it are counted against the current request by the
+    engine hooks above; QueryTimingMiddleware reports the totals.
+    """
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close() 
+
+async def get_write_session() -> AsyncSession:
+    """Get a database session for an endpoint that writes
+
+    Its transactions start with BEGIN IMMEDIATE on the production SQLite
+    profile, so lock waits happen before any work is done.
+    """
+    async with AsyncWriteSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
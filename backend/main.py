@@ -1,35 +1,28 @@
+import asyncio
 import logging
-import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import uvicorn
-from database import init_db
-from api import auth, farmers, experts, products, dealers, appointments, orders, admin
+from database import init_db, engine
+from api import auth, farmers, experts, products, dealers, appointments, orders, reviews, admin, exports
 from config import settings
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import httpx
-import sqlite3
-from datetime import datetime
-import os
-from typing import List, Optional
+from compression import CompressionMiddleware
+from observability import setup_logging, stop_logging, AccessLogMiddleware, QueryTimingMiddleware
+from metrics import MetricsMiddleware, monitor_event_loop_lag, register_pool_metrics, render_metrics
 
-# Configure logging to only use stdout (no file logging)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging to only use stdout (no file logging), written from a
+# background thread so the event loop never blocks on stdout
+setup_logging(getattr(logging, settings.log_level.upper(), logging.INFO))
 logger = logging.getLogger(__name__)
 
+register_pool_metrics(engine.pool)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
@@ -42,10 +35,14 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database initialization failed: {e}")
         raise
     
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag(settings.event_loop_lag_interval_seconds))
+    
     yield
     
     # Shutdown
     logger.info("Shutting down SLAM Robotics Agriculture Platform API...")
+    lag_monitor.cancel()
+    stop_logging()
 
 # Create FastAPI app with proper configuration
 app = FastAPI(
@@ -54,6 +51,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -70,6 +68,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After", "Link", "Server-Timing"],
+)
+
+# Response compression (gzip, or brotli when installed)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
+# Structured access log: one JSON line per request, sampled for noisy routes
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rates=settings.access_log_sample_rates,
+    slow_request_ms=settings.access_log_slow_request_ms
+)
+
+# Prometheus request metrics (latency per route template, in-flight requests)
+app.add_middleware(MetricsMiddleware)
+
+# Per-request query count and DB time (Server-Timing header), N+1 warnings
+app.add_middleware(
+    QueryTimingMiddleware,
+    n_plus_one_threshold=settings.n_plus_one_threshold,
+    server_timing=settings.server_timing_enabled,
+    timing_allow_origins=settings.allowed_origins
 )
 
 # Global exception handlers
@@ -78,7 +98,9 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     logger.error(f"HTTP Exception: {exc.status_code} - {exc.detail}")
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": exc.detail, "status_code": exc.status_code}
+        content={"error": exc.detail, "status_code": exc.status_code},
+        # Keeps Retry-After on 503s and WWW-Authenticate on 401s
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(RequestValidationError)
@@ -86,7 +108,8 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     logger.error(f"Validation Error: {exc.errors()}")
     return JSONResponse(
         status_code=422,
-        content={"error": "Validation error", "details": exc.errors()}
+        # Validator errors carry the raised exception in ctx, which json can't encode
+        content={"error": "Validation error", "details": jsonable_encoder(exc.errors())}
     )
 
 @app.exception_handler(Exception)
@@ -105,7 +128,9 @@ app.include_router(products.router, prefix="/api/products", tags=["Products"])
 app.include_router(dealers.router, prefix="/api/dealers", tags=["Dealers"])
 app.include_router(appointments.router, prefix="/api/appointments", tags=["Appointments"])
 app.include_router(orders.router, prefix="/api/orders", tags=["Orders"])
+app.include_router(reviews.router, prefix="/api/reviews", tags=["Reviews"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(exports.router, prefix="/api/exports", tags=["Exports"])
 
 # Root endpoint
 @app.get("/")
@@ -128,14 +153,14 @@ async def health_check():
         "version": "1.0.0"
     }
 
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests"""
-    logger.info(f"{request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"{request.method} {request.url.path} - {response.status_code}")
-    return response
+async def metrics():
+    """Request, database, connection pool and event loop metrics in Prometheus text format"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Prometheus metrics endpoint, unauthenticated, so only mounted when enabled
+if settings.metrics_enabled:
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
 
 # Forwarded headers middleware for Cloud Run
 @app.middleware("http")
@@ -167,267 +192,7 @@ if __name__ == "__main__":
         port=port,
         reload=settings.debug,
         log_level="info",
+        access_log=False,  # AccessLogMiddleware writes the access log
         ssl_keyfile=ssl_keyfile,
         ssl_certfile=ssl_certfile
     ) 
-
-app = FastAPI(title="Crop Advisory System", version="1.0.0")
-
-# CORS middleware for frontend integration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your domain
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Database setup
-def init_db():
-    conn = sqlite3.connect('advisory_logs.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS advisory_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            location TEXT NOT NULL,
-            crop TEXT NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            temperature REAL,
-            humidity REAL,
-            alerts TEXT,
-            recommendations TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# Initialize database on startup
-init_db()
-
-class AdvisoryRequest(BaseModel):
-    name: str
-    location: str
-    crop: str
-
-class AdvisoryResponse(BaseModel):
-    location: str
-    temperature: float
-    humidity: float
-    alerts: List[str]
-    recommendations: List[str]
-    success: bool
-    message: str
-
-# OpenWeatherMap API configuration
-OPENWEATHER_API_KEY = "your_openweather_api_key_here"  # Replace with your API key
-OPENWEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
-
-async def get_weather_data(location: str) -> dict:
-    """Fetch weather data from OpenWeatherMap API"""
-    try:
-        async with httpx.AsyncClient() as client:
-            params = {
-                "q": location,
-                "appid": OPENWEATHER_API_KEY,
-                "units": "metric"
-            }
-            response = await client.get(OPENWEATHER_BASE_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "temperature": data["main"]["temp"],
-                "humidity": data["main"]["humidity"],
-                "description": data["weather"][0]["description"]
-            }
-    except Exception as e:
-        print(f"Weather API error: {e}")
-        # Return default values for demo purposes
-        return {
-            "temperature": 25.0,
-            "humidity": 65.0,
-            "description": "Partly cloudy"
-        }
-
-def generate_advisory(crop: str, temperature: float, humidity: float) -> tuple:
-    """Generate crop advisory based on weather conditions"""
-    alerts = []
-    recommendations = []
-    
-    # Wheat advisory logic
-    if crop.lower() == "wheat":
-        if humidity > 70:
-            alerts.append("⚠️ High risk of wheat rust due to high humidity")
-            recommendations.append("Apply Mancozeb fungicide (2.5 kg/ha)")
-            recommendations.append("Reduce irrigation frequency")
-        
-        if temperature > 30:
-            alerts.append("🌡️ High temperature stress detected")
-            recommendations.append("Increase irrigation frequency")
-            recommendations.append("Apply foliar spray with micronutrients")
-        
-        if temperature < 15:
-            alerts.append("❄️ Low temperature may affect growth")
-            recommendations.append("Delay irrigation until temperature rises")
-            recommendations.append("Consider using row covers")
-        
-        if 20 <= temperature <= 25 and 50 <= humidity <= 65:
-            recommendations.append("✅ Optimal conditions for wheat growth")
-            recommendations.append("Continue regular irrigation schedule")
-            recommendations.append("Monitor for early signs of pests")
-    
-    # Tomato advisory logic
-    elif crop.lower() == "tomato":
-        if humidity > 80:
-            alerts.append("⚠️ High risk of early blight and late blight")
-            recommendations.append("Apply Copper oxychloride (3g/liter)")
-            recommendations.append("Improve air circulation")
-            recommendations.append("Avoid overhead irrigation")
-        
-        if temperature > 35:
-            alerts.append("🌡️ Heat stress may cause flower drop")
-            recommendations.append("Increase shade net coverage")
-            recommendations.append("Apply calcium nitrate foliar spray")
-            recommendations.append("Water in early morning or evening")
-        
-        if temperature < 10:
-            alerts.append("❄️ Cold stress may affect fruit setting")
-            recommendations.append("Use plastic mulch to retain soil heat")
-            recommendations.append("Consider greenhouse cultivation")
-        
-        if 20 <= temperature <= 30 and 60 <= humidity <= 70:
-            recommendations.append("✅ Optimal conditions for tomato growth")
-            recommendations.append("Maintain regular pruning schedule")
-            recommendations.append("Monitor for whitefly and aphids")
-    
-    # Cotton advisory logic
-    elif crop.lower() == "cotton":
-        if humidity > 75:
-            alerts.append("⚠️ High risk of bacterial blight and boll rot")
-            recommendations.append("Apply Streptomycin sulfate (500 ppm)")
-            recommendations.append("Remove infected plant parts")
-            recommendations.append("Improve field drainage")
-        
-        if temperature > 40:
-            alerts.append("🌡️ Extreme heat may cause boll shedding")
-            recommendations.append("Increase irrigation frequency")
-            recommendations.append("Apply potassium nitrate spray")
-            recommendations.append("Use shade nets during peak hours")
-        
-        if temperature < 15:
-            alerts.append("❄️ Cold stress may delay flowering")
-            recommendations.append("Delay sowing until temperature rises")
-            recommendations.append("Use plastic mulch for soil warming")
-        
-        if 25 <= temperature <= 35 and 50 <= humidity <= 70:
-            recommendations.append("✅ Optimal conditions for cotton growth")
-            recommendations.append("Monitor for pink bollworm")
-            recommendations.append("Maintain proper plant spacing")
-            recommendations.append("Apply balanced NPK fertilizer")
-    
-    # General recommendations based on weather
-    if not alerts:
-        recommendations.append("🌤️ Weather conditions are favorable for crop growth")
-    
-    if not recommendations:
-        recommendations.append("📋 Continue with regular farming practices")
-        recommendations.append("🔍 Monitor crop health regularly")
-    
-    return alerts, recommendations
-
-def log_advisory(name: str, location: str, crop: str, temperature: float, 
-                 humidity: float, alerts: List[str], recommendations: List[str]):
-    """Log advisory session to SQLite database"""
-    try:
-        conn = sqlite3.connect('advisory_logs.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO advisory_logs 
-            (name, location, crop, temperature, humidity, alerts, recommendations)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            name, location, crop, temperature, humidity,
-            '; '.join(alerts), '; '.join(recommendations)
-        ))
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Database logging error: {e}")
-
-@app.post("/get-advisory", response_model=AdvisoryResponse)
-async def get_crop_advisory(request: AdvisoryRequest):
-    """Generate crop advisory based on location and weather"""
-    try:
-        # Get weather data
-        weather_data = await get_weather_data(request.location)
-        temperature = weather_data["temperature"]
-        humidity = weather_data["humidity"]
-        
-        # Generate advisory
-        alerts, recommendations = generate_advisory(
-            request.crop, temperature, humidity
-        )
-        
-        # Log the session
-        log_advisory(
-            request.name, request.location, request.crop,
-            temperature, humidity, alerts, recommendations
-        )
-        
-        return AdvisoryResponse(
-            location=request.location,
-            temperature=temperature,
-            humidity=humidity,
-            alerts=alerts,
-            recommendations=recommendations,
-            success=True,
-            message="Advisory generated successfully"
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating advisory: {str(e)}")
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "Crop Advisory System"}
-
-@app.get("/logs")
-async def get_logs():
-    """Get recent advisory logs (for debugging)"""
-    try:
-        conn = sqlite3.connect('advisory_logs.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT name, location, crop, timestamp, temperature, humidity, alerts, recommendations
-            FROM advisory_logs 
-            ORDER BY timestamp DESC 
-            LIMIT 10
-        ''')
-        logs = cursor.fetchall()
-        conn.close()
-        
-        return {
-            "logs": [
-                {
-                    "name": log[0],
-                    "location": log[1],
-                    "crop": log[2],
-                    "timestamp": log[3],
-                    "temperature": log[4],
-                    "humidity": log[5],
-                    "alerts": log[6],
-                    "recommendations": log[7]
-                }
-                for log in logs
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
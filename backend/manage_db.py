@@ -3,18 +3,124 @@
 Database Management Script for SLAM Robotics Platform
 """
 
+import argparse
 import asyncio
 import os
-import shutil
+import time
 from datetime import datetime
-from database import init_db, AsyncSessionLocal
-from models import User, Farmer, Expert, Dealer, Product, Order, Appointment, Review
+from database import (
+    init_db, AsyncSessionLocal, engine, add_missing_columns, create_missing_indexes, create_product_search_index
+)
+from models import (
+    SQLModel, User, Farmer, Expert, Dealer, Product, Order, Appointment, Review,
+    UserRole, ProductCategory, OrderStatus, AppointmentStatus
+)
+from schemas import UserRead, FarmerRead, ExpertRead, DealerRead, ProductRead, OrderRead, AppointmentRead, ReviewRead
 from sqlmodel import select
+from sqlalchemy import text, update
+from api.pagination import PageParams, page_query
+from api.admin import pending_criteria, pending_chunk_query, status_update_statement
+from api.dealers import dashboard_query
+from api.products import search_query
+from api.orders import reserve_stock_statement, order_parties_query
+from api.appointments import appointment_parties_query
+from api.exports import EXPORTS, export_query
 from config import settings
+from seeding import seed_database, scaled_counts, SEED_PASSWORD
+from aggregates import (
+    recompute_aggregates, rebuild_daily_sales, guarded_status_update, product_dealers_query, review_rating_sql,
+    FARMER_ORDERS_SQL, DEALER_SALES_SQL, EXPERT_CONSULTATIONS_SQL, PROFILE_TABLES
+)
+from backups import create_backup, restore_backup, prune_backups, list_backups, database_path
+
+def router_queries():
+    """Every statement the API routers issue that reads or filters, for plan auditing
+
+    Built with the routers' own query helpers wherever a router has one, so
+    the audited SQL is the SQL they run; list endpoints are audited on their
+    first page and on a cursor page. The remaining point lookups are listed
+    as the routers write them. INSERTs have no access path to audit.
+    """
+    first = PageParams(after=None, limit=settings.default_page_size, fields=None)
+    cursor = PageParams(after=1, limit=settings.default_page_size, fields=None)
+    since, until = datetime(2025, 1, 1), datetime(2025, 2, 1)
+
+    def pages(label, model, schema, *criteria, order_by=None):
+        return [
+            (f"{label} (first page)", page_query(model, schema, first, *criteria, order_by=order_by)),
+            (f"{label} (after cursor)", page_query(model, schema, cursor, *criteria, order_by=order_by)),
+        ]
+
+    pending = pending_criteria(None, None, None)
+    pending_filtered = pending_criteria(UserRole.FARMER, since, until)
+    return [
+        ("auth: user by email", select(User).where(User.email == "user@example.com")),
+        *pages("admin: pending users", User, UserRead, *pending, order_by=User.created_at),
+        *pages("admin: pending users by role and date", User, UserRead, *pending_filtered, order_by=User.created_at),
+        ("admin: batch pending walk", pending_chunk_query(pending_filtered, None, settings.admin_batch_chunk_size)),
+        ("admin: batch pending walk (after keyset)",
+            pending_chunk_query(pending_filtered, (since, 1), settings.admin_batch_chunk_size)),
+        ("admin: set pending users' status", status_update_statement([1, 2, 3], "approved")),
+        ("admin: set user status", status_update_statement([1], "approved", pending_only=False)),
+        ("admin: status of unchanged users", select(User.id, User.status).where(User.id.in_([1, 2, 3]))),
+        *pages("farmers: list active", Farmer, FarmerRead, Farmer.is_active == True),
+        ("farmers: by id", select(Farmer).where(Farmer.id == 1)),
+        ("farmers: by user", select(Farmer).where(Farmer.user_id == 1)),
+        ("farmers: own profile", select(Farmer).where(Farmer.id == 1, Farmer.user_id == 1)),
+        *pages("experts: list active", Expert, ExpertRead, Expert.is_active == True),
+        ("experts: by id", select(Expert).where(Expert.id == 1)),
+        ("experts: by user", select(Expert).where(Expert.user_id == 1)),
+        *pages("dealers: list active", Dealer, DealerRead, Dealer.is_active == True),
+        ("dealers: by id", select(Dealer).where(Dealer.id == 1)),
+        ("dealers: owner", select(Dealer.user_id).where(Dealer.id == 1)),
+        ("dealers: dashboard", dashboard_query(1, since.date(), until.date())),
+        ("dealers: dashboard for a product", dashboard_query(1, since.date(), until.date(), product_id=1)),
+        *pages("products: list", Product, ProductRead),
+        *pages("products: by category", Product, ProductRead, Product.category == ProductCategory.SEEDS),
+        ("products: search", search_query('"drone"*', None, 0, settings.default_page_size)),
+        ("products: search by category", search_query('"drone"*', ProductCategory.DRONES, 0, settings.default_page_size)),
+        ("products: by id", select(Product).where(Product.id == 1)),
+        ("products: dealer of user", select(Dealer.id).where(Dealer.user_id == 1)),
+        *pages("orders: list", Order, OrderRead),
+        ("orders: batch farmer owner", select(Farmer.user_id).where(Farmer.id == 1)),
+        ("orders: reserve stock", reserve_stock_statement(1, 1)),
+        ("orders: product exists", select(Product.id).where(Product.id == 1)),
+        ("orders: with buyer and seller", order_parties_query(1)),
+        ("orders: change status", guarded_status_update(Order, 1, OrderStatus.PENDING, OrderStatus.CANCELLED)),
+        ("orders: restock", update(Product).where(Product.id == 1)
+            .values(stock_quantity=Product.stock_quantity + 1)),
+        ("orders: farmer order counter", FARMER_ORDERS_SQL.bindparams(n=1, farmer_id=1)),
+        ("orders: dealer sales counter", DEALER_SALES_SQL.bindparams(n=1, product_id=1)),
+        ("orders: dealers of products", product_dealers_query([1, 2])),
+        *pages("appointments: list", Appointment, AppointmentRead),
+        ("appointments: with farmer and expert", appointment_parties_query(1)),
+        ("appointments: change status", guarded_status_update(
+            Appointment, 1, AppointmentStatus.PENDING, AppointmentStatus.COMPLETED)),
+        ("appointments: expert consultation counter", EXPERT_CONSULTATIONS_SQL.bindparams(n=1, expert_id=1)),
+        *pages("reviews: list", Review, ReviewRead),
+        *pages("reviews: by reviewed user", Review, ReviewRead, Review.reviewed_id == 1),
+        ("reviews: reviewed user role", select(User.role).where(User.id == 1)),
+        *[
+            (f"reviews: {table} rating", review_rating_sql(table).bindparams(rating=5, user_id=1))
+            for table in PROFILE_TABLES.values()
+        ],
+        *[
+            (f"exports: {name}", export_query(model, columns, since, until))
+            for name, (model, columns) in EXPORTS.items()
+        ],
+    ]
+
+# Plans that report a SCAN without reading the whole table on each request
+EXPECTED_FULL_SCANS = {
+    # Exports stream whole tables by design
+    *(f"exports: {name}" for name in EXPORTS),
+    # Unfiltered first pages walk the table in id order and stop after limit + 1 rows
+    *(f"{name}: list (first page)" for name in ("products", "orders", "appointments", "reviews")),
+}
 
 class DatabaseManager:
     def __init__(self):
-        self.db_path = "agri_platform.db"
+        self.db_path = database_path()
     
     async def init_database(self):
         """Initialize database tables"""
@@ -27,24 +133,114 @@ class DatabaseManager:
         if os.path.exists(self.db_path):
             os.remove(self.db_path)
             print(f"🗑️ Deleted existing database: {self.db_path}")
+        # A leftover WAL would otherwise be replayed into the new database
+        for sidecar in (f"{self.db_path}-wal", f"{self.db_path}-shm"):
+            try:
+                os.remove(sidecar)
+            except FileNotFoundError:
+                pass
         
         await self.init_database()
         print("✅ Database reset successfully!")
     
-    async def backup_database(self):
-        """Create a backup of the database"""
+    async def backup_database(self, argv):
+        """Create a compressed online backup: backup [--keep N]"""
+        parser = argparse.ArgumentParser(prog="manage_db.py backup")
+        parser.add_argument("--keep", type=int, default=settings.backup_keep_last, help="Number of newest backups to keep")
+        args = parser.parse_args(argv)
+        
         if not os.path.exists(self.db_path):
             print("❌ Database file not found!")
             return
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"agri_platform_backup_{timestamp}.db"
+        result = await asyncio.to_thread(create_backup, self.db_path)
+        print(f"💾 Database backed up to: {result.path}")
+        print(f"  - Snapshot: {result.database_bytes / 1024 / 1024:,.1f} MB in {result.snapshot_seconds:.1f}s "
+              f"({result.steps} step(s), {result.restarts} restart(s))")
+        print(f"  - Compressed: {result.compressed_bytes / 1024 / 1024:,.1f} MB ({result.ratio:.0%}) "
+              f"in {result.compress_seconds:.1f}s")
+        
+        for path in await asyncio.to_thread(prune_backups, settings.backup_dir, args.keep):
+            print(f"🗑️ Removed expired backup: {path}")
+    
+    async def restore_database(self, argv):
+        """Restore a backup over the database after an integrity check: restore FILE"""
+        if not argv:
+            backups = list_backups()
+            print("❌ Usage: python manage_db.py restore <backup file>")
+            print(f"📋 Available backups ({len(backups)}):")
+            for path in backups:
+                print(f"  - {path} ({os.path.getsize(path) / 1024 / 1024:,.1f} MB)")
+            return
+        
+        backup_path = argv[0]
+        if not os.path.exists(backup_path):
+            print(f"❌ Backup file not found: {backup_path}")
+            return
+        
+        # Keep the current contents recoverable in case this was the wrong file
+        if os.path.exists(self.db_path):
+            current = await asyncio.to_thread(create_backup, self.db_path)
+            print(f"💾 Current database backed up to: {current.path}")
+        
+        print(f"🔄 Verifying and restoring {backup_path}...")
+        elapsed = await asyncio.to_thread(restore_backup, backup_path, self.db_path)
+        print(f"✅ Database restored in {elapsed:.1f}s ({os.path.getsize(self.db_path) / 1024 / 1024:,.1f} MB)")
+    
+    async def migrate_database(self):
+        """Bring an existing database up to date with the models (tables and indexes)"""
+        print("🔄 Migrating database...")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            added = await conn.run_sync(add_missing_columns)
+            created = await conn.run_sync(create_missing_indexes)
+            if created:
+                await conn.execute(text("ANALYZE"))
+            if await conn.run_sync(create_product_search_index):
+                created.append("products_fts")
         
-        # Create backups directory if it doesn't exist
-        os.makedirs("backups", exist_ok=True)
+        if added:
+            print(f"✅ Added {len(added)} column(s):")
+            for name in added:
+                print(f"  - {name}")
+            print("💡 Run 'python manage_db.py reconcile' to fill in counters and ratings")
+        if created:
+            print(f"✅ Created {len(created)} index(es):")
+            for name in created:
+                print(f"  - {name}")
+        if not added and not created:
+            print("✅ Database schema is up to date")
+    
+    async def explain_queries(self):
+        """Run every router query through EXPLAIN QUERY PLAN and flag full-table scans"""
+        dialect = engine.sync_engine.dialect
+        full_scans = []
+        
+        async with engine.connect() as conn:
+            for label, query in router_queries():
+                sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+                details = [row[-1] for row in result.fetchall()]
+                # "SCAN <table>" without an index is a full-table scan;
+                # "SCAN <table> USING INDEX ..." walks an index and
+                # "SCAN <fts> VIRTUAL TABLE INDEX ..." queries the FTS index
+                scans = [
+                    d for d in details
+                    if d.startswith("SCAN") and "USING" not in d and "VIRTUAL TABLE" not in d
+                ]
+                
+                expected = label in EXPECTED_FULL_SCANS
+                print(f"{'⚠️' if scans and not expected else '✅'} {label}"
+                      f"{' (scan expected)' if scans and expected else ''}")
+                for detail in details:
+                    print(f"    {detail}")
+                if scans and not expected:
+                    full_scans.append(label)
         
-        shutil.copy2(self.db_path, f"backups/{backup_name}")
-        print(f"💾 Database backed up to: backups/{backup_name}")
+        if full_scans:
+            print(f"\n⚠️ {len(full_scans)} quer(ies) perform full-table scans: {', '.join(full_scans)}")
+        else:
+            print("\n✅ No full-table scans found")
     
     async def view_tables(self):
         """View all tables in the database"""
@@ -123,6 +319,43 @@ class DatabaseManager:
             await session.commit()
             print("✅ Sample data created successfully!")
     
+    async def seed_database(self, argv):
+        """Bulk-load deterministic synthetic data: seed --scale N [--seed S]"""
+        parser = argparse.ArgumentParser(prog="manage_db.py seed")
+        parser.add_argument("--scale", type=float, default=1.0, help="Data set size; 1 unit is 1,000 orders")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed and scale give the same rows")
+        args = parser.parse_args(argv)
+        
+        # Bulk chunks and the counter refresh are slow by design; don't log each one
+        settings.slow_query_ms = max(settings.slow_query_ms, 60_000)
+        await init_db()
+        counts = scaled_counts(args.scale)
+        print(f"🌱 Seeding scale {args.scale:g} (seed {args.seed}): " + ", ".join(f"{n:,} {name}" for name, n in counts.items()))
+        started = time.perf_counter()
+        inserted = await seed_database(args.scale, seed=args.seed)
+        total = sum(inserted.values())
+        print(f"✅ Inserted {total:,} rows in {time.perf_counter() - started:.1f}s")
+        print(f"🔑 Seeded accounts use the password: {SEED_PASSWORD}")
+    
+    async def reconcile_aggregates(self):
+        """Recompute profile counters and ratings from orders, appointments and reviews"""
+        print("🔄 Reconciling counters and ratings...")
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            corrected = await recompute_aggregates(conn)
+        
+        for column, count in corrected.items():
+            print(f"{'⚠️' if count else '✅'} {column}: {count:,} row(s) corrected")
+        print(f"✅ Reconciled in {time.perf_counter() - started:.1f}s")
+    
+    async def rebuild_rollups(self):
+        """Rebuild the dealer daily sales rollups from the orders table"""
+        print("🔄 Rebuilding dealer daily sales rollups...")
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            rows = await rebuild_daily_sales(conn)
+        print(f"✅ Rebuilt {rows:,} rollup row(s) in {time.perf_counter() - started:.1f}s")
+    
     def show_database_info(self):
         """Show database information"""
         if os.path.exists(self.db_path):
@@ -150,20 +383,28 @@ Usage: python manage_db.py [command]
 
 Commands:
   init      - Initialize database tables
+  migrate   - Add missing tables and indexes to an existing database
+  explain   - Audit router queries with EXPLAIN QUERY PLAN
   reset     - Reset database (delete and recreate)
-  backup    - Create database backup
+  backup    - Create a compressed online backup: backup [--keep N]
+  restore   - Verify and restore a backup: restore FILE
   tables    - View all tables
   users     - View all users
   pending   - View pending users
   products  - View all products
   sample    - Create sample data
+  reconcile - Recompute profile counters and ratings
+  rollups   - Rebuild dealer daily sales rollups (dashboard backfill)
+  seed      - Generate synthetic data: seed --scale N [--seed S]
   info      - Show database information
   help      - Show this help message
 
 Examples:
   python manage_db.py init
   python manage_db.py backup
+  python manage_db.py restore backups/agri_platform_backup_20250101_020000.db.gz
   python manage_db.py users
+  python manage_db.py seed --scale 100
         """)
         return
     
@@ -172,10 +413,16 @@ Examples:
     try:
         if command == "init":
             await manager.init_database()
+        elif command == "migrate":
+            await manager.migrate_database()
+        elif command == "explain":
+            await manager.explain_queries()
         elif command == "reset":
             await manager.reset_database()
         elif command == "backup":
-            await manager.backup_database()
+            await manager.backup_database(sys.argv[2:])
+        elif command == "restore":
+            await manager.restore_database(sys.argv[2:])
         elif command == "tables":
             await manager.view_tables()
         elif command == "users":
@@ -186,6 +433,12 @@ Examples:
             await manager.view_products()
         elif command == "sample":
             await manager.create_sample_data()
+        elif command == "reconcile":
+            await manager.reconcile_aggregates()
+        elif command == "rollups":
+            await manager.rebuild_rollups()
+        elif command == "seed":
+            await manager.seed_database(sys.argv[2:])
         elif command == "info":
             manager.show_database_info()
         elif command == "help":
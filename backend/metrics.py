@@ -0,0 +1,126 @@
+import asyncio
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from observability import route_template
+
+QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA", "CREATE", "BEGIN", "COMMIT", "ROLLBACK"}
+
+# HTTP metrics
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+)
+
+# Database metrics
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by operation",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "SQL statements that raised an error",
+    ["operation"],
+)
+
+# Event loop metrics
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between a scheduled wake-up of the event loop and when it actually ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_LAG_LAST = Gauge(
+    "event_loop_lag_last_seconds",
+    "Most recent event loop lag sample",
+)
+
+def query_operation(statement: str) -> str:
+    """Leading SQL keyword of a statement, bounded to a fixed label set"""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in QUERY_OPERATIONS else "OTHER"
+
+def observe_query(statement: str, duration: float) -> None:
+    DB_QUERY_DURATION.labels(query_operation(statement)).observe(duration)
+
+def observe_query_error(statement: str) -> None:
+    DB_QUERY_ERRORS.labels(query_operation(statement)).inc()
+
+class PoolCollector(Collector):
+    """Connection pool occupancy, read from the pool at scrape time"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def collect(self):
+        # StaticPool and NullPool have no sizing to report
+        for name, documentation, reader in (
+            ("db_pool_size", "Configured number of pooled connections", "size"),
+            ("db_pool_checked_out", "Connections currently checked out of the pool", "checkedout"),
+            ("db_pool_checked_in", "Idle connections available in the pool", "checkedin"),
+            ("db_pool_overflow", "Connections open beyond pool_size (negative while the pool fills)", "overflow"),
+        ):
+            value = getattr(self.pool, reader, None)
+            if value is not None:
+                yield GaugeMetricFamily(name, documentation, value=value())
+
+def register_pool_metrics(pool) -> None:
+    REGISTRY.register(PoolCollector(pool))
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Sleep for interval and record how late the loop woke up, until cancelled
+
+    Lag grows when something blocks the loop (CPU-bound work, sync I/O), which
+    delays every in-flight request by the same amount.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+
+def render_metrics() -> tuple:
+    """Prometheus text exposition of the default registry and its content type"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+class MetricsMiddleware:
+    """Record per-route latency and the number of in-flight requests"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            REQUEST_LATENCY.labels(method, route_template(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
@@ -1,6 +1,7 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 class UserRole(str, Enum):
@@ -36,11 +37,15 @@ class UserBase(SQLModel):
     phone: str = Field(max_length=15)
     name: str = Field(max_length=100)
     country: str = Field(default="India")
-    is_active: bool = Field(default=True)
+    is_active: bool = Field(default=True, index=True)
     is_verified: bool = Field(default=False)
 
 class User(UserBase, table=True):
     __tablename__ = "users"
+    # Leading status column also serves plain status filters
+    __table_args__ = (
+        Index("ix_users_status_created_at", "status", "created_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     hashed_password: str
     role: UserRole
@@ -51,34 +56,37 @@ class User(UserBase, table=True):
 class Farmer(UserBase, table=True):
     __tablename__ = "farmers"
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id")
+    user_id: int = Field(foreign_key="users.id", index=True)
     farm_size: Optional[float] = None
     crop_types: Optional[str] = None
     experience_years: Optional[int] = None
     location: Optional[str] = None
     bio: Optional[str] = None
     rating: Optional[float] = Field(default=0.0)
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     total_orders: int = Field(default=0)
 
 class Expert(UserBase, table=True):
     __tablename__ = "experts"
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id")
+    user_id: int = Field(foreign_key="users.id", index=True)
     specialization: str
     qualification: str
     experience_years: int
     consultation_fee: float
     rating: Optional[float] = Field(default=0.0)
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     total_consultations: int = Field(default=0)
 
 class Dealer(UserBase, table=True):
     __tablename__ = "dealers"
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id")
+    user_id: int = Field(foreign_key="users.id", index=True)
     company_name: str
     business_type: str
     products_offered: Optional[str] = None
     rating: Optional[float] = Field(default=0.0)
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     total_sales: int = Field(default=0)
 
 class Product(SQLModel, table=True):
@@ -86,9 +94,9 @@ class Product(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     description: str
-    category: ProductCategory
+    category: ProductCategory = Field(index=True)
     price: float
-    dealer_id: int = Field(foreign_key="dealers.id")
+    dealer_id: int = Field(foreign_key="dealers.id", index=True)
     stock_quantity: int
     image_url: Optional[str] = None
     rating: Optional[float] = Field(default=0.0)
@@ -96,8 +104,12 @@ class Product(SQLModel, table=True):
 
 class Order(SQLModel, table=True):
     __tablename__ = "orders"
+    # Leading status column also serves plain status filters
+    __table_args__ = (
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
-    farmer_id: int = Field(foreign_key="farmers.id")
+    farmer_id: int = Field(foreign_key="farmers.id", index=True)
     product_id: int = Field(foreign_key="products.id")
     quantity: int
     total_amount: float
@@ -105,12 +117,31 @@ class Order(SQLModel, table=True):
     delivery_address: str
     delivery_date: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set when placing the order took the quantity out of product stock
+    # (batch orders); only those orders give it back when cancelled
+    stock_reserved: bool = Field(default=False, sa_column_kwargs={"server_default": "0"})
+
+class DealerDailySales(SQLModel, table=True):
+    """Daily order rollup per dealer, product and order status
+
+    Maintained alongside order writes (aggregates.apply_orders). The key
+    leads with (dealer_id, day) so a dashboard date range is one index
+    range scan.
+    """
+    __tablename__ = "dealer_daily_sales"
+    dealer_id: int = Field(foreign_key="dealers.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    product_id: int = Field(foreign_key="products.id", primary_key=True)
+    status: OrderStatus = Field(primary_key=True)
+    orders: int = Field(default=0)
+    units: int = Field(default=0)
+    revenue: float = Field(default=0.0)
 
 class Appointment(SQLModel, table=True):
     __tablename__ = "appointments"
     id: Optional[int] = Field(default=None, primary_key=True)
     farmer_id: int = Field(foreign_key="farmers.id")
-    expert_id: int = Field(foreign_key="experts.id")
+    expert_id: int = Field(foreign_key="experts.id", index=True)
     service_type: str
     preferred_date: datetime
     notes: Optional[str] = None
@@ -121,7 +152,7 @@ class Review(SQLModel, table=True):
     __tablename__ = "reviews"
     id: Optional[int] = Field(default=None, primary_key=True)
     reviewer_id: int = Field(foreign_key="users.id")
-    reviewed_id: int = Field(foreign_key="users.id")
+    reviewed_id: int = Field(foreign_key="users.id", index=True)
     rating: int = Field(ge=1, le=5)
     comment: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow) 
\ No newline at end of file
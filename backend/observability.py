@@ -0,0 +1,245 @@
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+UNMATCHED_ROUTE = "<unmatched>"
+
+access_logger = logging.getLogger("access")
+query_logger = logging.getLogger("sql")
+_log_listener: Optional[QueueListener] = None
+
+class StdoutFormatter(logging.Formatter):
+    """Plain format for application logs, one JSON object per line for access logs"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        access = getattr(record, "access", None)
+        if access is None:
+            return super().format(record)
+        entry = {
+            "severity": record.levelname,
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "message": record.getMessage(),
+            **access,
+        }
+        return json.dumps(entry, separators=(",", ":"))
+
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """Route all log records through a queue drained by a background thread
+
+    Handlers on the event loop only enqueue; formatting and the blocking
+    write to stdout happen on the listener thread, so stdout backpressure
+    never stalls request handling.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return _log_listener
+
+    log_queue = queue.SimpleQueue()
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.setFormatter(StdoutFormatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _log_listener = QueueListener(log_queue, stdout_handler, respect_handler_level=True)
+    _log_listener.start()
+    return _log_listener
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+_route_templates = {}
+
+def route_template(scope: Scope) -> str:
+    """The path template of the route that served a request (e.g. /api/products/{product_id})
+
+    Templates keep log and metric label cardinality bounded, unlike raw paths.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return UNMATCHED_ROUTE
+    template = _route_templates.get(endpoint)
+    if template is None:
+        template = UNMATCHED_ROUTE
+        for candidate in app.router.routes:
+            if getattr(candidate, "endpoint", None) is endpoint:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    template = candidate.path
+                    break
+        _route_templates[endpoint] = template
+    return template
+
+class AccessLogMiddleware:
+    """Emit one structured access-log record per request
+
+    sample_rates maps route templates to the fraction of requests logged
+    (e.g. {"/health": 0.01}); server errors and slow requests are always
+    logged regardless of sampling.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rates: Optional[dict] = None, slow_request_ms: float = 1000.0):
+        self.app = app
+        self.sample_rates = sample_rates or {}
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self.log(scope, status_code, duration_ms, response_bytes)
+
+    def log(self, scope: Scope, status_code: int, duration_ms: float, response_bytes: int) -> None:
+        route = route_template(scope)
+        rate = self.sample_rates.get(route, 1.0)
+        always = status_code >= 500 or duration_ms >= self.slow_request_ms
+        if not always and rate < 1.0 and random.random() >= rate:
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+        access_logger.info(
+            "%s %s %s", method, path, status_code,
+            extra={"access": {
+                "httpRequest": {
+                    "requestMethod": method,
+                    "requestUrl": path,
+                    "status": status_code,
+                    "responseSize": str(response_bytes),
+                    "remoteIp": client[0] if client else None,
+                    "latency": f"{duration_ms / 1000:.6f}s",
+                },
+                "route": route,
+                "duration_ms": round(duration_ms, 3),
+                "sample_rate": rate,
+            }}
+        )
+
+# Per-request query tracking
+
+_placeholder_list = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_whitespace = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only in IN-list length compare equal"""
+    return _placeholder_list.sub("(?)", _whitespace.sub(" ", statement).strip())
+
+class QueryStats:
+    """Queries executed while serving one request"""
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.count = 0
+        self.duration = 0.0
+        self.selects = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        shape = statement_shape(statement)
+        if shape[:6].upper() == "SELECT":
+            self.selects[shape] += 1
+
+    def route(self) -> str:
+        return route_template(self.scope) if self.scope is not None else "<background>"
+
+    def repeated_selects(self, threshold: int) -> list:
+        return [(shape, count) for shape, count in self.selects.most_common() if count >= threshold]
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def log_slow_query(statement: str, parameters, duration: float, include_parameters: bool = False) -> None:
+    stats = current_query_stats.get()
+    route = stats.route() if stats is not None else "<background>"
+    params = repr(parameters)[:500] if include_parameters else "<hidden>"
+    query_logger.warning(
+        "Slow query (%.1fms) on %s: %s params=%s",
+        duration * 1000, route, _whitespace.sub(" ", statement).strip(), params
+    )
+
+class QueryTimingMiddleware:
+    """Track the queries each request runs
+
+    Adds a Server-Timing header with the query count and total database time
+    (visible in browser dev tools) and warns when one request repeats the same
+    SELECT shape threshold times or more, the signature of an N+1 loop.
+    """
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 10, server_timing: bool = True,
+                 timing_allow_origins: Optional[list] = None):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+        # Browsers hide Server-Timing from cross-origin pages unless allowed
+        self.timing_allow_origin = ", ".join(
+            origin for origin in (timing_allow_origins or []) if "*" not in origin
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;desc="queries: {stats.count}";dur={stats.duration * 1000:.2f}'
+                )
+                if self.timing_allow_origin:
+                    headers["Timing-Allow-Origin"] = self.timing_allow_origin
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            for shape, count in stats.repeated_selects(self.n_plus_one_threshold):
+                query_logger.warning(
+                    "Possible N+1 on %s %s: %d executions of %s",
+                    scope["method"], stats.route(), count, shape[:300]
+                )
@@ -0,0 +1,148 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import field_validator
+from sqlmodel import Field, SQLModel
+from models import UserRole, OrderStatus, ProductCategory, AppointmentStatus
+
+# Response schemas. Each lists exactly the columns the API returns (never
+# secrets such as password hashes); list endpoints SELECT only these columns
+# and serialize the rows directly, skipping ORM objects altogether.
+
+class UserRead(SQLModel):
+    id: int
+    email: str
+    phone: str
+    name: str
+    country: str
+    is_active: bool
+    is_verified: bool
+    role: UserRole
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+class FarmerRead(SQLModel):
+    id: int
+    user_id: int
+    email: str
+    phone: str
+    name: str
+    country: str
+    is_active: bool
+    is_verified: bool
+    farm_size: Optional[float] = None
+    crop_types: Optional[str] = None
+    experience_years: Optional[int] = None
+    location: Optional[str] = None
+    bio: Optional[str] = None
+    rating: Optional[float] = None
+    rating_count: int = 0
+    total_orders: int
+
+class ExpertRead(SQLModel):
+    id: int
+    user_id: int
+    email: str
+    phone: str
+    name: str
+    country: str
+    is_active: bool
+    is_verified: bool
+    specialization: str
+    qualification: str
+    experience_years: int
+    consultation_fee: float
+    rating: Optional[float] = None
+    rating_count: int = 0
+    total_consultations: int
+
+class DealerRead(SQLModel):
+    id: int
+    user_id: int
+    email: str
+    phone: str
+    name: str
+    country: str
+    is_active: bool
+    is_verified: bool
+    company_name: str
+    business_type: str
+    products_offered: Optional[str] = None
+    rating: Optional[float] = None
+    rating_count: int = 0
+    total_sales: int
+
+class ProductRead(SQLModel):
+    id: int
+    name: str
+    description: str
+    category: ProductCategory
+    price: float
+    dealer_id: int
+    stock_quantity: int
+    image_url: Optional[str] = None
+    rating: Optional[float] = None
+    created_at: datetime
+
+class OrderRead(SQLModel):
+    id: int
+    farmer_id: int
+    product_id: int
+    quantity: int
+    total_amount: float
+    status: OrderStatus
+    delivery_address: str
+    delivery_date: Optional[datetime] = None
+    created_at: datetime
+
+class AppointmentRead(SQLModel):
+    id: int
+    farmer_id: int
+    expert_id: int
+    service_type: str
+    preferred_date: datetime
+    notes: Optional[str] = None
+    status: AppointmentStatus
+    created_at: datetime
+
+class ReviewRead(SQLModel):
+    id: int
+    reviewer_id: int
+    reviewed_id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+
+# Request schemas
+
+class ProductCreate(SQLModel):
+    name: str
+    description: str
+    category: ProductCategory
+    price: float = Field(ge=0)
+    stock_quantity: int = Field(ge=0)
+    image_url: Optional[str] = None
+    # Only admins choose the dealer; dealers always create their own products
+    dealer_id: Optional[int] = None
+
+class ProductUpdate(SQLModel):
+    """Fields left out of the body keep their current value"""
+    name: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[ProductCategory] = None
+    price: Optional[float] = Field(default=None, ge=0)
+    stock_quantity: Optional[int] = Field(default=None, ge=0)
+    image_url: Optional[str] = None
+
+    @field_validator("name", "description", "category", "price", "stock_quantity")
+    @classmethod
+    def reject_null(cls, value):
+        # Only runs for fields present in the body; these columns are NOT NULL
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+def schema_columns(model, schema) -> list:
+    """Table columns of ``model`` backing the fields of a response schema"""
+    columns = model.__table__.columns
+    return [columns[name] for name in schema.model_fields]
@@ -0,0 +1,334 @@
+"""
+Deterministic synthetic data for capacity testing
+
+seed_database() generates referentially consistent users, farmers, experts,
+dealers, products, orders, appointments and reviews. Rows are inserted with
+Core executemany in chunks, one transaction per table, on a single
+connection whose durability pragmas are relaxed for the duration of the load.
+The same seed and scale always produce the same rows.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator
+from passlib.hash import bcrypt
+from sqlalchemy import func, insert, select
+from config import settings
+from database import engine, PRODUCT_SEARCH_DDL, sqlite_pragmas
+from aggregates import recompute_aggregates, rebuild_daily_sales
+from models import (
+    User, Farmer, Expert, Dealer, Product, Order, Appointment, Review,
+    UserRole, OrderStatus, ProductCategory, AppointmentStatus
+)
+
+SEED_PASSWORD = "seed-password"
+
+# Rows per unit of --scale; scale 1000 gives ~1M orders
+BASE_COUNTS = {
+    "farmers": 100,
+    "experts": 10,
+    "dealers": 10,
+    "pending_users": 20,
+    "products": 200,
+    "orders": 1000,
+    "appointments": 200,
+    "reviews": 300,
+}
+
+CHUNK_ROWS = 20000
+
+# Fixed window so the generated data does not depend on when it was generated
+DATA_END = datetime(2025, 6, 30)
+DATA_SPAN = timedelta(days=365)
+
+# Durability is pointless while bulk loading a throwaway data set
+LOAD_PRAGMAS = {"synchronous": "OFF", "cache_size": -262144, "temp_store": "MEMORY"}
+
+FIRST_NAMES = (
+    "Aarav Aditi Amit Ananya Arjun Deepa Gaurav Harpreet Ishaan Kavya Lakshmi Manoj "
+    "Meera Naveen Neha Pooja Priya Rahul Rajesh Ravi Sanjay Sita Sunil Suresh Vikram Zoya"
+).split()
+LAST_NAMES = (
+    "Patel Sharma Singh Kumar Reddy Nair Iyer Gupta Das Yadav Joshi Mehta Rao Chauhan Pillai Verma"
+).split()
+LOCATIONS = (
+    "Punjab Haryana Gujarat Maharashtra Karnataka Kerala Tamil-Nadu Andhra-Pradesh "
+    "Bihar Uttar-Pradesh West-Bengal Rajasthan Madhya-Pradesh Odisha"
+).split()
+CROPS = "wheat rice cotton sugarcane maize soybean groundnut tomato potato onion mustard".split()
+SPECIALIZATIONS = (
+    "Soil Health", "Crop Protection", "Irrigation", "Organic Farming",
+    "Precision Agriculture", "Horticulture", "Farm Machinery",
+)
+SERVICE_TYPES = ("soil testing", "crop advisory", "pest diagnosis", "irrigation planning", "drone survey")
+BRANDS = ("AgriTech", "KisanPro", "GreenField", "FarmMax", "SLAM", "Harvestor", "Bhoomi")
+PRODUCT_LINES = {
+    ProductCategory.DRONES: (("Spray Drone", "Mapping Drone", "Seeding Drone"), (150000, 900000)),
+    ProductCategory.TRACTORS: (("Compact Tractor", "Utility Tractor", "Orchard Tractor"), (350000, 1500000)),
+    ProductCategory.ROBOTS: (("Weeding Robot", "Harvesting Robot", "Scouting Robot"), (200000, 2500000)),
+    ProductCategory.SEEDS: (("Hybrid Wheat Seed", "Basmati Rice Seed", "Bt Cotton Seed", "Tomato Seed"), (200, 4000)),
+    ProductCategory.FERTILIZERS: (("Urea", "DAP", "Organic Compost", "NPK 19-19-19", "Potash"), (250, 3000)),
+    ProductCategory.MACHINERY: (("Rotavator", "Seed Drill", "Power Tiller", "Drip Irrigation Kit"), (15000, 300000)),
+}
+BULK_CATEGORIES = {ProductCategory.SEEDS, ProductCategory.FERTILIZERS}
+
+def scaled_counts(scale: float) -> Dict[str, int]:
+    return {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+
+def timeline(rng: random.Random, count: int) -> Iterator[datetime]:
+    """Increasing timestamps across the data window, so ids follow time as in production"""
+    start = DATA_END - DATA_SPAN
+    step = DATA_SPAN / count
+    for i in range(count):
+        yield start + step * i + step * rng.random()
+
+def age_weighted_status(rng: random.Random, when: datetime, recent: tuple, settled: tuple):
+    """Older rows are mostly settled (delivered, completed); recent ones still open"""
+    age = (DATA_END - when) / DATA_SPAN
+    statuses, weights = recent if age < 0.05 else settled
+    return rng.choices(statuses, weights)[0]
+
+def person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def phone(rng: random.Random) -> str:
+    return f"+91{rng.randint(6000000000, 9999999999)}"
+
+async def next_ids(conn) -> Dict[str, int]:
+    """Highest existing id per table, so seeded rows can reference each other by id"""
+    offsets = {}
+    for model in (User, Farmer, Expert, Dealer, Product, Order, Appointment, Review):
+        result = await conn.execute(select(func.coalesce(func.max(model.id), 0)))
+        offsets[model.__tablename__] = result.scalar_one()
+    return offsets
+
+async def insert_chunks(conn, model, rows: Iterable[dict], chunk_rows: int) -> int:
+    inserted = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            await conn.execute(insert(model), chunk)
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        await conn.execute(insert(model), chunk)
+        inserted += len(chunk)
+    await conn.commit()
+    return inserted
+
+async def seed_database(
+    scale: float,
+    seed: int = 42,
+    chunk_rows: int = CHUNK_ROWS,
+    progress: Callable[[str], None] = print,
+) -> Dict[str, int]:
+    """Generate and bulk-insert a data set of ``scale`` units; returns rows per table"""
+    rng = random.Random(seed)
+    counts = scaled_counts(scale)
+    # One hash for every seeded account; the salt comes from the seed too
+    salt = "".join(rng.choice("./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789") for _ in range(21)) + "e"
+    hashed_password = bcrypt.using(salt=salt, rounds=settings.bcrypt_rounds).hash(SEED_PASSWORD)
+    inserted = {}
+
+    async with engine.connect() as conn:
+        offsets = await next_ids(conn)
+        for name, value in LOAD_PRAGMAS.items():
+            await conn.exec_driver_sql(f"PRAGMA {name}={value}")
+        try:
+            def timed(label: str, count: int, started: float):
+                elapsed = time.perf_counter() - started
+                inserted[label] = count
+                progress(f"  - {label:<13} {count:>10,} rows  {elapsed:6.1f}s  ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+            nf, ne, nd = counts["farmers"], counts["experts"], counts["dealers"]
+            user_base = offsets["users"]
+            farmer_user = lambda i: user_base + 1 + i
+            expert_user = lambda i: user_base + 1 + nf + i
+            dealer_user = lambda i: user_base + 1 + nf + ne + i
+            admin_user = user_base + 1 + nf + ne + nd + counts["pending_users"]
+
+            # Users: one account per profile, then pending sign-ups and an admin
+            people = [(person(rng), phone(rng)) for _ in range(nf + ne + nd + counts["pending_users"])]
+            roles = [UserRole.FARMER] * nf + [UserRole.EXPERT] * ne + [UserRole.DEALER] * nd
+            roles += [rng.choice((UserRole.FARMER, UserRole.EXPERT, UserRole.DEALER)) for _ in range(counts["pending_users"])]
+
+            def users():
+                for i, joined in enumerate(timeline(rng, len(people))):
+                    user_id = user_base + 1 + i
+                    status = "approved" if i < nf + ne + nd else rng.choices(("pending", "rejected"), (4, 1))[0]
+                    yield {
+                        "id": user_id, "email": f"{roles[i].value}.{user_id}@seed.klipsmart.local",
+                        "phone": people[i][1], "name": people[i][0], "country": "India",
+                        "is_active": True, "is_verified": status == "approved",
+                        "hashed_password": hashed_password, "role": roles[i], "status": status,
+                        "created_at": joined, "updated_at": joined,
+                    }
+                yield {
+                    "id": admin_user, "email": f"admin.{admin_user}@seed.klipsmart.local",
+                    "phone": phone(rng), "name": "Seed Admin", "country": "India",
+                    "is_active": True, "is_verified": True, "hashed_password": hashed_password,
+                    "role": UserRole.ADMIN, "status": "approved",
+                    "created_at": DATA_END - DATA_SPAN, "updated_at": DATA_END - DATA_SPAN,
+                }
+
+            def profile(user_id: int) -> dict:
+                name, number = people[user_id - user_base - 1]
+                return {
+                    "user_id": user_id, "email": f"{roles[user_id - user_base - 1].value}.{user_id}@seed.klipsmart.local",
+                    "phone": number, "name": name, "country": "India", "is_active": True, "is_verified": True,
+                }
+
+            def farmers():
+                for i in range(nf):
+                    yield {
+                        **profile(farmer_user(i)), "id": offsets["farmers"] + 1 + i,
+                        "farm_size": round(rng.lognormvariate(1.2, 0.8), 1),
+                        "crop_types": ",".join(rng.sample(CROPS, rng.randint(1, 3))),
+                        "experience_years": rng.randint(1, 40),
+                        "location": rng.choice(LOCATIONS), "bio": None,
+                        "rating": 0.0, "total_orders": 0,
+                    }
+
+            def experts():
+                for i in range(ne):
+                    yield {
+                        **profile(expert_user(i)), "id": offsets["experts"] + 1 + i,
+                        "specialization": rng.choice(SPECIALIZATIONS),
+                        "qualification": rng.choice(("M.Sc. Agriculture", "Ph.D. Agronomy", "B.Sc. Agriculture")),
+                        "experience_years": rng.randint(2, 35),
+                        "consultation_fee": float(rng.choice((300, 500, 750, 1000, 1500))),
+                        "rating": 0.0, "total_consultations": 0,
+                    }
+
+            def dealers():
+                for i in range(nd):
+                    yield {
+                        **profile(dealer_user(i)), "id": offsets["dealers"] + 1 + i,
+                        "company_name": f"{rng.choice(BRANDS)} {rng.choice(LOCATIONS)} Agro {i + 1}",
+                        "business_type": rng.choice(("retail", "wholesale", "distributor")),
+                        "products_offered": None, "rating": 0.0, "total_sales": 0,
+                    }
+
+            # Product prices and categories are needed to price the orders
+            product_prices = []
+            product_bulk = []
+
+            def products():
+                categories = list(PRODUCT_LINES)
+                for i, listed in enumerate(timeline(rng, counts["products"])):
+                    category = rng.choice(categories)
+                    lines, (low, high) = PRODUCT_LINES[category]
+                    line = rng.choice(lines)
+                    brand = rng.choice(BRANDS)
+                    price = round(rng.uniform(low, high), 2)
+                    product_prices.append(price)
+                    product_bulk.append(category in BULK_CATEGORIES)
+                    yield {
+                        "id": offsets["products"] + 1 + i,
+                        "name": f"{brand} {line} {rng.choice('ABCDEFGHKMPRSX')}{rng.randint(10, 999)}",
+                        "description": f"{line} by {brand} for {', '.join(rng.sample(CROPS, 2))} farms",
+                        "category": category, "price": price,
+                        "dealer_id": offsets["dealers"] + 1 + rng.randrange(nd),
+                        "stock_quantity": rng.randint(0, 500), "image_url": None,
+                        "rating": round(rng.uniform(3.0, 5.0), 1), "created_at": listed,
+                    }
+
+            order_statuses = (
+                ((OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.SHIPPED, OrderStatus.CANCELLED), (5, 3, 2, 1)),
+                ((OrderStatus.DELIVERED, OrderStatus.CANCELLED), (9, 1)),
+            )
+
+            def orders():
+                for i, placed in enumerate(timeline(rng, counts["orders"])):
+                    index = rng.randrange(len(product_prices))
+                    quantity = rng.randint(1, 50) if product_bulk[index] else 1
+                    status = age_weighted_status(rng, placed, *order_statuses)
+                    yield {
+                        "id": offsets["orders"] + 1 + i,
+                        "farmer_id": offsets["farmers"] + 1 + rng.randrange(nf),
+                        "product_id": offsets["products"] + 1 + index,
+                        "quantity": quantity,
+                        "total_amount": round(product_prices[index] * quantity, 2),
+                        "status": status,
+                        "delivery_address": f"{rng.randint(1, 999)} Farm Road, {rng.choice(LOCATIONS)}",
+                        "delivery_date": placed + timedelta(days=rng.randint(2, 10)) if status == OrderStatus.DELIVERED else None,
+                        "created_at": placed,
+                    }
+
+            appointment_statuses = (
+                ((AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.CANCELLED), (5, 4, 1)),
+                ((AppointmentStatus.COMPLETED, AppointmentStatus.CANCELLED), (17, 3)),
+            )
+
+            def appointments():
+                for i, booked in enumerate(timeline(rng, counts["appointments"])):
+                    yield {
+                        "id": offsets["appointments"] + 1 + i,
+                        "farmer_id": offsets["farmers"] + 1 + rng.randrange(nf),
+                        "expert_id": offsets["experts"] + 1 + rng.randrange(ne),
+                        "service_type": rng.choice(SERVICE_TYPES),
+                        "preferred_date": booked + timedelta(days=rng.randint(1, 14), hours=rng.randint(8, 17)),
+                        "notes": None,
+                        "status": age_weighted_status(rng, booked, *appointment_statuses),
+                        "created_at": booked,
+                    }
+
+            def reviews():
+                for i, written in enumerate(timeline(rng, counts["reviews"])):
+                    reviewed = expert_user(rng.randrange(ne)) if rng.random() < 0.5 else dealer_user(rng.randrange(nd))
+                    rating = rng.choices((1, 2, 3, 4, 5), (1, 1, 3, 8, 7))[0]
+                    yield {
+                        "id": offsets["reviews"] + 1 + i,
+                        "reviewer_id": farmer_user(rng.randrange(nf)),
+                        "reviewed_id": reviewed,
+                        "rating": rating,
+                        "comment": rng.choice((None, "Very helpful", "Good service", "Delivery was late", "Excellent quality")),
+                        "created_at": written,
+                    }
+
+            for label, model, rows in (
+                ("users", User, users()),
+                ("farmers", Farmer, farmers()),
+                ("experts", Expert, experts()),
+                ("dealers", Dealer, dealers()),
+            ):
+                started = time.perf_counter()
+                timed(label, await insert_chunks(conn, model, rows, chunk_rows), started)
+
+            # Index products in one FTS rebuild instead of a trigger call per row
+            started = time.perf_counter()
+            await conn.exec_driver_sql("DROP TRIGGER IF EXISTS products_fts_ai")
+            try:
+                count = await insert_chunks(conn, Product, products(), chunk_rows)
+            finally:
+                for statement in PRODUCT_SEARCH_DDL:
+                    await conn.exec_driver_sql(statement)
+                await conn.exec_driver_sql("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+                await conn.commit()
+            timed("products", count, started)
+
+            for label, model, rows in (
+                ("orders", Order, orders()),
+                ("appointments", Appointment, appointments()),
+                ("reviews", Review, reviews()),
+            ):
+                started = time.perf_counter()
+                timed(label, await insert_chunks(conn, model, rows, chunk_rows), started)
+
+            started = time.perf_counter()
+            await recompute_aggregates(conn, offsets)
+            await rebuild_daily_sales(conn)
+            await conn.exec_driver_sql("ANALYZE")
+            await conn.commit()
+            progress(f"  - counters, rollups and ANALYZE  {time.perf_counter() - started:6.1f}s")
+        finally:
+            # The connection goes back to the pool: restore the production pragmas
+            # (outside any transaction, where SQLite would ignore them)
+            await conn.rollback()
+            production = sqlite_pragmas()
+            for name in LOAD_PRAGMAS:
+                await conn.exec_driver_sql(f"PRAGMA {name}={production[name]}")
+            await conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return inserted
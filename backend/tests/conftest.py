@@ -0,0 +1,92 @@
+"""
+Shared test setup: one temporary SQLite database for the whole run
+
+settings and the engine are process-wide, so DATABASE_URL is set here,
+before any test module imports them. Tests are plain functions that drive
+their async code through the `run` fixture (a fresh event loop per call).
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='backend_tests_'), 'test.db')}"
+)
+os.environ.setdefault("DEBUG", "false")
+
+import httpx
+import pytest
+from database import init_db, engine, AsyncSessionLocal
+from models import User, Farmer, Expert, Dealer, Product, UserRole, ProductCategory
+from api.auth import get_current_user
+from main import app
+
+STOCK = 20
+
+def run_async(coroutine):
+    """Run a coroutine on a new event loop, then release the pooled connections bound to it"""
+    async def wrapper():
+        try:
+            return await coroutine
+        finally:
+            await engine.dispose()
+    return asyncio.run(wrapper())
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    run_async(init_db())
+
+@pytest.fixture
+def run():
+    return run_async
+
+@pytest.fixture
+def act_as():
+    """Authenticate API requests as the given user for the rest of the test"""
+    def act_as(user: User):
+        app.dependency_overrides[get_current_user] = lambda: user
+    yield act_as
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def client():
+    def client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.klipsmart.shop")
+    return client
+
+async def seed_world() -> SimpleNamespace:
+    async with AsyncSessionLocal() as session:
+        users = {
+            role: User(email=f"{role.value}.{os.urandom(4).hex()}@example.com", phone="9999999999",
+                       name=role.value, hashed_password="x", role=role, status="approved")
+            for role in UserRole
+        }
+        session.add_all(users.values())
+        await session.flush()
+        farmer_user, expert_user, dealer_user = (
+            users[UserRole.FARMER], users[UserRole.EXPERT], users[UserRole.DEALER]
+        )
+        farmer = Farmer(user_id=farmer_user.id, email=farmer_user.email, phone="9999999999", name="Farmer")
+        expert = Expert(user_id=expert_user.id, email=expert_user.email, phone="9999999999", name="Expert",
+                        specialization="Soil", qualification="MSc", experience_years=5, consultation_fee=500.0)
+        dealer = Dealer(user_id=dealer_user.id, email=dealer_user.email, phone="9999999999", name="Dealer",
+                        company_name="Agro Supplies", business_type="retail")
+        session.add_all([farmer, expert, dealer])
+        await session.flush()
+        product = Product(name="Seed drill", description="Seed drill", category=ProductCategory.MACHINERY,
+                          price=100.0, dealer_id=dealer.id, stock_quantity=STOCK)
+        session.add(product)
+        await session.commit()
+        return SimpleNamespace(
+            admin=users[UserRole.ADMIN], farmer_user=farmer_user, expert_user=expert_user,
+            dealer_user=dealer_user, farmer=farmer, expert=expert, dealer=dealer, product=product,
+        )
+
+@pytest.fixture
+def world():
+    """Fresh approved users of every role, their profiles and a product with STOCK units"""
+    return run_async(seed_world())
@@ -0,0 +1,56 @@
+"""
+Appointment status changes keep the expert's total_consultations in step
+
+Usage: python -m pytest -q tests/test_appointment_status.py
+"""
+
+from datetime import datetime, timedelta
+from database import engine, AsyncSessionLocal
+from models import Appointment, Expert
+from aggregates import recompute_aggregates
+
+async def consultations(expert_id: int) -> int:
+    async with AsyncSessionLocal() as session:
+        return (await session.get(Expert, expert_id)).total_consultations
+
+def booking(world) -> dict:
+    return {
+        "farmer_id": world.farmer.id, "expert_id": world.expert.id, "service_type": "soil test",
+        "preferred_date": (datetime.utcnow() + timedelta(days=3)).isoformat(),
+    }
+
+def test_completing_and_reopening_moves_the_counter(run, world, act_as, client):
+    act_as(world.farmer_user)
+
+    async def test():
+        async with client() as api:
+            created = await api.post("/api/appointments/", json=booking(world))
+            appointment_id = created.json()["id"]
+
+            async def move(status: str):
+                return await api.put(f"/api/appointments/{appointment_id}/status", json={"status": status})
+
+            assert (await move("confirmed")).status_code == 200
+            assert await consultations(world.expert.id) == 0
+            assert (await move("completed")).json()["status"] == "completed"
+            assert await consultations(world.expert.id) == 1
+            assert (await move("completed")).status_code == 200
+            assert await consultations(world.expert.id) == 1
+            assert (await move("cancelled")).status_code == 200
+            assert await consultations(world.expert.id) == 0
+            assert (await move("completed")).status_code == 409
+
+        async with engine.begin() as conn:
+            assert (await recompute_aggregates(conn))["experts.total_consultations"] == 0
+    run(test())
+
+def test_new_appointments_start_pending(run, world, client):
+    async def test():
+        async with client() as api:
+            created = await api.post("/api/appointments/", json={**booking(world), "status": "completed"})
+        assert created.status_code == 200
+        assert created.json()["status"] == "pending"
+        async with AsyncSessionLocal() as session:
+            assert (await session.get(Appointment, created.json()["id"])).status.value == "pending"
+        assert await consultations(world.expert.id) == 0
+    run(test())
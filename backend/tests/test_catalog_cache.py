@@ -0,0 +1,86 @@
+"""
+Catalog cache: stock movements keep list pages, listing edits re-render them
+
+Usage: python -m pytest -q tests/test_catalog_cache.py
+"""
+
+from sqlalchemy import update
+from database import get_session, AsyncSessionLocal, AsyncWriteSessionLocal
+from models import Product
+from api import products
+from main import app
+
+def test_stock_changes_keep_list_pages_and_edits_bump_them(run, world, act_as, client):
+    act_as(world.admin)
+
+    async def test():
+        async with client() as api:
+            created = await api.post("/api/products/", json={
+                "name": "Seed drill", "description": "Seed drill", "category": "machinery",
+                "price": 100.0, "stock_quantity": 20, "dealer_id": world.dealer.id,
+            })
+            assert created.status_code == 200
+            product_id = created.json()["id"]
+
+            version = products.catalog_version
+            batch = await api.post("/api/orders/batch", json={
+                "farmer_id": world.farmer.id, "delivery_address": "1 Farm Road",
+                "items": [{"product_id": product_id, "quantity": 5}],
+            })
+            assert batch.status_code == 200
+            assert products.catalog_version == version
+            assert (await api.get(f"/api/products/{product_id}")).json()["stock_quantity"] == 15
+
+            restocked = await api.put(f"/api/products/{product_id}", json={"stock_quantity": 40})
+            assert restocked.json()["stock_quantity"] == 40
+            assert products.catalog_version == version
+
+            repriced = await api.put(f"/api/products/{product_id}", json={"price": 90.0})
+            assert repriced.json()["price"] == 90.0
+            assert products.catalog_version == version + 1
+
+            rejected = await api.put(f"/api/products/{product_id}", json={"name": None})
+            assert rejected.status_code == 422
+            invalid = await api.post("/api/products/", json={"name": "Seed drill", "dealer_id": world.dealer.id})
+            assert invalid.status_code == 422
+    run(test())
+
+class RepricedMidRead:
+    """A session whose product read is overtaken by a price change"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement):
+        result = await self.session.execute(statement)
+        product = result.scalar_one_or_none()
+        async with AsyncWriteSessionLocal() as writer:
+            await writer.execute(update(Product).where(Product.id == product.id).values(price=90.0))
+            await writer.commit()
+        products.invalidate_catalog(product.id)
+        return StaleResult(product)
+
+class StaleResult:
+    def __init__(self, product):
+        self.product = product
+
+    def scalar_one_or_none(self):
+        return self.product
+
+def test_product_read_overtaken_by_update_is_not_cached(run, world, client):
+    product_id = world.product.id
+
+    async def overtaken_session():
+        async with AsyncSessionLocal() as session:
+            yield RepricedMidRead(session)
+
+    async def test():
+        async with client() as api:
+            app.dependency_overrides[get_session] = overtaken_session
+            try:
+                # Read before the price change, so this response is still the old one
+                assert (await api.get(f"/api/products/{product_id}")).json()["price"] == 100.0
+            finally:
+                del app.dependency_overrides[get_session]
+            assert (await api.get(f"/api/products/{product_id}")).json()["price"] == 90.0
+    run(test())
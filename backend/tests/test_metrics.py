@@ -0,0 +1,11 @@
+"""
+The unauthenticated /metrics endpoint is only mounted when enabled
+
+Usage: python -m pytest -q tests/test_metrics.py
+"""
+
+def test_metrics_endpoint_is_off_by_default(run, client):
+    async def test():
+        async with client() as api:
+            assert (await api.get("/metrics")).status_code == 404
+    run(test())
@@ -0,0 +1,67 @@
+"""
+Order status changes: only orders that reserved stock give it back on cancel
+
+Usage: python -m pytest -q tests/test_order_status.py
+"""
+
+from database import AsyncSessionLocal
+from models import Product
+
+async def stock_of(product_id: int) -> int:
+    async with AsyncSessionLocal() as session:
+        return (await session.get(Product, product_id)).stock_quantity
+
+def test_cancelling_single_order_leaves_stock_unchanged(run, world, act_as, client):
+    stock = world.product.stock_quantity
+    act_as(world.admin)
+
+    async def test():
+        async with client() as api:
+            created = await api.post("/api/orders/", json={
+                "farmer_id": world.farmer.id, "product_id": world.product.id, "quantity": 3,
+                "total_amount": 300.0, "delivery_address": "1 Farm Road",
+                "stock_reserved": True,
+            })
+            assert created.status_code == 200
+            assert await stock_of(world.product.id) == stock
+
+            cancelled = await api.put(f"/api/orders/{created.json()['id']}/status", json={"status": "cancelled"})
+            assert cancelled.status_code == 200
+            assert cancelled.json()["status"] == "cancelled"
+        assert await stock_of(world.product.id) == stock
+    run(test())
+
+def test_cancelling_batch_order_restores_stock(run, world, act_as, client):
+    stock = world.product.stock_quantity
+    act_as(world.admin)
+
+    async def test():
+        async with client() as api:
+            batch = await api.post("/api/orders/batch", json={
+                "farmer_id": world.farmer.id, "delivery_address": "1 Farm Road",
+                "items": [{"product_id": world.product.id, "quantity": 5}],
+            })
+            assert batch.status_code == 200
+            assert await stock_of(world.product.id) == stock - 5
+
+            order_id = batch.json()["results"][0]["order_id"]
+            cancelled = await api.put(f"/api/orders/{order_id}/status", json={"status": "cancelled"})
+            assert cancelled.status_code == 200
+        assert await stock_of(world.product.id) == stock
+    run(test())
+
+def test_batch_order_only_for_own_farmer(run, world, act_as, client):
+    stock = world.product.stock_quantity
+    cart = {"farmer_id": world.farmer.id, "delivery_address": "1 Farm Road",
+            "items": [{"product_id": world.product.id, "quantity": 5}]}
+
+    async def test():
+        async with client() as api:
+            act_as(world.dealer_user)
+            assert (await api.post("/api/orders/batch", json=cart)).status_code == 403
+            assert await stock_of(world.product.id) == stock
+
+            act_as(world.farmer_user)
+            assert (await api.post("/api/orders/batch", json=cart)).status_code == 200
+        assert await stock_of(world.product.id) == stock - 5
+    run(test())
@@ -0,0 +1,55 @@
+"""
+The principal cache never keeps a user read before a concurrent status change
+
+Usage: python -m pytest -q tests/test_principal_cache.py
+"""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from database import AsyncSessionLocal, AsyncWriteSessionLocal
+from api.admin import set_user_status
+from api import auth
+from api.auth import get_current_user, create_access_token, principal_cache, principal_versions, invalidate_principal
+
+class RejectedMidLookup:
+    """A session whose user lookup is overtaken by an admin rejecting that user"""
+
+    def __init__(self, session, user_id: int):
+        self.session = session
+        self.user_id = user_id
+
+    async def execute(self, statement):
+        result = await self.session.execute(statement)
+        async with AsyncWriteSessionLocal() as admin_session:
+            await set_user_status(admin_session, [self.user_id], "rejected", pending_only=False)
+        return result
+
+def test_lookup_overtaken_by_status_change_is_not_cached(run, world):
+    user = world.farmer_user
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": user.email}))
+
+    async def test():
+        async with AsyncSessionLocal() as session:
+            # Read before the rejection, so this request still gets in
+            looked_up = await get_current_user(credentials, RejectedMidLookup(session, user.id))
+            assert looked_up.status == "approved"
+        assert principal_cache.get(user.email) is None
+
+        async with AsyncSessionLocal() as session:
+            with pytest.raises(HTTPException) as rejected:
+                await get_current_user(credentials, session)
+        assert rejected.value.status_code == 403
+    run(test())
+
+def test_invalidation_versions_are_pruned_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth.time, "monotonic", lambda: now[0])
+    principal_versions.clear()
+    for n in range(100):
+        invalidate_principal(f"batch.{n}@example.com")
+    assert len(principal_versions) == 100
+
+    now[0] += principal_cache.ttl + 1
+    invalidate_principal("later@example.com")
+    assert list(principal_versions) == ["later@example.com"]
@@ -0,0 +1,33 @@
+"""
+Write sessions serialize read-then-write transactions on SQLite
+
+Usage: python -m pytest -q tests/test_write_sessions.py
+"""
+
+import asyncio
+from sqlalchemy import text
+from database import engine, AsyncWriteSessionLocal
+
+WRITERS = 20
+
+def test_concurrent_read_modify_write_loses_no_updates(run):
+    async def increment():
+        async with AsyncWriteSessionLocal() as session:
+            count = (await session.execute(text("SELECT n FROM write_session_counter"))).scalar()
+            # Give the other writers a chance to read the same value
+            await asyncio.sleep(0.01)
+            await session.execute(text("UPDATE write_session_counter SET n = :n"), {"n": count + 1})
+            await session.commit()
+
+    async def test():
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE write_session_counter (n INTEGER NOT NULL)"))
+            await conn.execute(text("INSERT INTO write_session_counter VALUES (0)"))
+        try:
+            await asyncio.gather(*(increment() for _ in range(WRITERS)))
+            async with engine.connect() as conn:
+                assert (await conn.execute(text("SELECT n FROM write_session_counter"))).scalar() == WRITERS
+        finally:
+            async with engine.begin() as conn:
+                await conn.execute(text("DROP TABLE write_session_counter"))
+    run(test())
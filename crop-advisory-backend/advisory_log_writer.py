@@ -0,0 +1,149 @@
+"""
+Background batched writer for advisory_logs, shared by app.py and main.py
+
+Request handlers hand their rows to submit() (or submit_async() from the
+event loop), which only appends them to an in-memory buffer. One writer
+thread owns a persistent WAL-mode connection and drains the buffer with a
+single executemany per transaction, as soon as flush_rows rows are waiting or
+flush_interval seconds after the first of them arrived.
+
+When max_pending rows are already waiting, submit() blocks until the writer
+catches up (for at most `timeout`; the rows are then dropped and counted), so
+a stalled disk slows requests down instead of growing memory without bound.
+close() stops accepting rows, writes everything still buffered and joins the
+thread. Rows submitted together are always committed in the same
+transaction.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+INSERT_SQL = '''
+    INSERT INTO advisory_logs
+    (name, location, crop, temperature, humidity, alerts, recommendations)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+class AdvisoryLogWriter:
+    """Rows are (name, location, crop, temperature, humidity, alerts, recommendations)"""
+
+    def __init__(self, path: str, flush_rows: int = 500, flush_interval: float = 0.2,
+                 max_pending: int = 10000, busy_timeout: float = 5.0):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.busy_timeout = busy_timeout
+        self._pending: List[Sequence] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.counters = {"submitted": 0, "written": 0, "dropped": 0, "flushes": 0, "errors": 0}
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="advisory-log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, rows: Sequence[Sequence], timeout: Optional[float] = None) -> bool:
+        """Buffer rows for the writer; False when they were dropped
+
+        Blocks while the buffer is full, for at most ``timeout`` seconds
+        (0 never blocks, None waits indefinitely).
+        """
+        if self._offer(rows, timeout):
+            return True
+        with self._cond:
+            self.counters["dropped"] += len(rows)
+        return False
+
+    async def submit_async(self, rows: Sequence[Sequence], timeout: Optional[float] = None) -> bool:
+        """submit() for the event loop; waits for room on a worker thread, not the loop"""
+        if self._offer(rows, 0):
+            return True
+        return await asyncio.get_running_loop().run_in_executor(None, self.submit, rows, timeout)
+
+    def _offer(self, rows: Sequence[Sequence], timeout: Optional[float]) -> bool:
+        if not rows:
+            return True
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            # A batch larger than max_pending is let in once the buffer is empty
+            while not self._closed and self._pending and len(self._pending) + len(rows) > self.max_pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            if self._closed:
+                return False
+            was_empty = not self._pending
+            self._pending.extend(rows)
+            self.counters["submitted"] += len(rows)
+            if was_empty or len(self._pending) >= self.flush_rows:
+                self._cond.notify_all()
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Stop accepting rows, flush what is buffered and stop the writer"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self.counters, "pending": len(self._pending)}
+
+    def _take(self) -> List[Sequence]:
+        """Wait for a batch worth flushing; empty once closed and drained"""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            deadline = time.monotonic() + self.flush_interval
+            while not self._closed and len(self._pending) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            rows, self._pending = self._pending, []
+            # Wake producers waiting for room
+            self._cond.notify_all()
+        return rows
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            while True:
+                rows = self._take()
+                if not rows:
+                    break
+                self._write(conn, rows)
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, rows: List[Sequence]) -> None:
+        try:
+            with conn:
+                conn.executemany(INSERT_SQL, [
+                    (name, location, crop, temperature, humidity,
+                     '; '.join(alerts), '; '.join(recommendations))
+                    for name, location, crop, temperature, humidity, alerts, recommendations in rows
+                ])
+        except Exception as e:
+            print(f"Database logging error: {e}")
+            with self._cond:
+                self.counters["errors"] += 1
+                self.counters["dropped"] += len(rows)
+            return
+        with self._cond:
+            self.counters["written"] += len(rows)
+            self.counters["flushes"] += 1
@@ -0,0 +1,212 @@
+"""
+Data-driven crop advisory rules, shared by app.py and main.py
+
+The rules live in advisory_rules.json. Each crop has a list of rules, and
+each rule has `when` ranges on temperature and/or humidity (gt/gte/lt/lte),
+an optional alert and recommendations. Matching rules contribute in file
+order. The fallback messages are added when no rule raised an alert or
+recommended anything, and are all an unknown crop gets.
+
+load_rules() compiles the file once at startup. A crop's thresholds split
+each axis into cells (below, at and between breakpoints) on which every rule
+is uniformly true or false, so the advisory of every cell pair is computed
+ahead of time. Evaluating a reading is then a dict lookup for the crop, a
+binary search per axis and a table index, regardless of how many crops or
+rules there are. RuleEngine.evaluate_many() does the same for arrays of
+readings, with numpy when it is installed.
+"""
+
+import json
+import operator
+import os
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # numpy is optional; evaluate_many falls back to bisect
+    numpy = None
+
+RULES_PATH = os.getenv(
+    "ADVISORY_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "advisory_rules.json")
+)
+
+FIELDS = ("temperature", "humidity")
+OPERATORS = {"gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le}
+
+# Spellings of crop names remembered after their first lowering
+MAX_SPELLINGS = 1024
+
+# (alerts, recommendations); shared between cells, so never mutated
+Advisory = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+class Axis:
+    """Sorted breakpoints of one reading; n breakpoints make 2n + 1 cells"""
+
+    def __init__(self, breakpoints: Sequence[float]):
+        self.breakpoints = sorted(set(breakpoints))
+        self.cells = 2 * len(self.breakpoints) + 1
+        self.array = numpy.asarray(self.breakpoints, dtype=float) if numpy is not None else None
+
+    def representatives(self) -> List[float]:
+        """One value inside each cell, in cell order"""
+        points = self.breakpoints
+        if not points:
+            return [0.0]
+        values = [points[0] - 1.0]
+        for i, point in enumerate(points):
+            values.append(point)
+            values.append((point + points[i + 1]) / 2 if i + 1 < len(points) else point + 1.0)
+        return values
+
+    def cell(self, value: float) -> int:
+        i = bisect_left(self.breakpoints, value)
+        if i < len(self.breakpoints) and self.breakpoints[i] == value:
+            return 2 * i + 1
+        return 2 * i
+
+    def cell_array(self, values):
+        """cell() over a numpy array"""
+        if not self.breakpoints:
+            return numpy.zeros(len(values), dtype=numpy.intp)
+        i = numpy.searchsorted(self.array, values, side="left")
+        exact = (i < len(self.breakpoints)) & (self.array[numpy.minimum(i, len(self.breakpoints) - 1)] == values)
+        return 2 * i + exact
+
+class CompiledCrop:
+    """Advisory table of one crop over its temperature x humidity cells"""
+
+    __slots__ = ("temperature", "humidity", "table")
+
+    def __init__(self, temperature: Axis, humidity: Axis, table: List[Advisory]):
+        self.temperature = temperature
+        self.humidity = humidity
+        self.table = table
+
+    def evaluate(self, temperature: float, humidity: float) -> Advisory:
+        return self.table[self.temperature.cell(temperature) * self.humidity.cells + self.humidity.cell(humidity)]
+
+    def evaluate_many(self, temperatures: Sequence[float], humidities: Sequence[float]) -> List[Advisory]:
+        if len(temperatures) != len(humidities):
+            raise ValueError("temperatures and humidities must have the same length")
+        if numpy is not None:
+            cells = (
+                self.temperature.cell_array(numpy.asarray(temperatures, dtype=float)) * self.humidity.cells
+                + self.humidity.cell_array(numpy.asarray(humidities, dtype=float))
+            )
+            return [self.table[cell] for cell in cells.tolist()]
+        temperature_cell, humidity_cell, cells = self.temperature.cell, self.humidity.cell, self.humidity.cells
+        return [
+            self.table[temperature_cell(temperature) * cells + humidity_cell(humidity)]
+            for temperature, humidity in zip(temperatures, humidities)
+        ]
+
+class RuleEngine:
+    """Compiled rules for every crop; see load_rules()"""
+
+    def __init__(self, crops: Dict[str, CompiledCrop], default: CompiledCrop):
+        self.crops = crops
+        self.default = default
+        self._spellings: Dict[str, CompiledCrop] = {}
+        for name, compiled in crops.items():
+            for spelling in (name, name.title(), name.upper()):
+                self._spellings[spelling] = compiled
+
+    def crop(self, name: str) -> CompiledCrop:
+        """Compiled rules for a crop name in any case; unknown crops get the fallbacks"""
+        compiled = self._spellings.get(name)
+        if compiled is None:
+            compiled = self.crops.get(name.lower(), self.default)
+            if len(self._spellings) < MAX_SPELLINGS:
+                self._spellings[name] = compiled
+        return compiled
+
+    def evaluate(self, crop: str, temperature: float, humidity: float) -> Tuple[List[str], List[str]]:
+        """(alerts, recommendations) for one reading"""
+        alerts, recommendations = self.crop(crop).evaluate(temperature, humidity)
+        return list(alerts), list(recommendations)
+
+    def evaluate_many(self, crop: str, temperatures: Sequence[float],
+                      humidities: Sequence[float]) -> List[Advisory]:
+        """(alerts, recommendations) tuples for paired arrays of readings"""
+        return self.crop(crop).evaluate_many(temperatures, humidities)
+
+def compile_conditions(crop: str, index: int, when: dict) -> List[tuple]:
+    """(field, operator, value) per bound of a rule's `when` ranges"""
+    conditions = []
+    for field, bounds in when.items():
+        if field not in FIELDS:
+            raise ValueError(f"{crop} rule {index}: unknown field {field!r} (expected one of {FIELDS})")
+        for name, value in bounds.items():
+            if name not in OPERATORS:
+                raise ValueError(f"{crop} rule {index}: unknown bound {name!r} (expected one of {tuple(OPERATORS)})")
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{crop} rule {index}: {field}.{name} must be a number")
+            conditions.append((field, OPERATORS[name], float(value)))
+    return conditions
+
+def axis_masks(axis: Axis, field: str, compiled: List[tuple]) -> List[int]:
+    """Per cell, a bitmask of the rules whose `field` bounds hold there"""
+    masks = []
+    for value in axis.representatives():
+        mask = 0
+        for bit, (conditions, _, _) in enumerate(compiled):
+            if all(op(value, bound) for name, op, bound in conditions if name == field):
+                mask |= 1 << bit
+        masks.append(mask)
+    return masks
+
+def compile_crop(crop: str, rules: List[dict], fallback: dict) -> CompiledCrop:
+    """Work out the advisory of every cell pair and store them in a table
+
+    A rule matches a cell pair when its temperature bounds hold on the
+    temperature cell and its humidity bounds on the humidity cell, so the
+    matching rules are the AND of two per-axis bitmasks; each distinct set
+    of matching rules is turned into an advisory once.
+    """
+    compiled = [
+        (compile_conditions(crop, index, rule.get("when", {})), rule.get("alert"), rule.get("recommendations", []))
+        for index, rule in enumerate(rules)
+    ]
+    axes = {
+        field: Axis([value for conditions, _, _ in compiled for name, _, value in conditions if name == field])
+        for field in FIELDS
+    }
+    temperature_masks = axis_masks(axes["temperature"], "temperature", compiled)
+    humidity_masks = axis_masks(axes["humidity"], "humidity", compiled)
+
+    advisories: Dict[int, Advisory] = {}
+
+    def advisory_for(mask: int) -> Advisory:
+        alerts, recommendations = [], []
+        for bit, (_, alert, advice) in enumerate(compiled):
+            if mask >> bit & 1:
+                if alert:
+                    alerts.append(alert)
+                recommendations.extend(advice)
+        if not alerts:
+            recommendations.extend(fallback.get("no_alerts", []))
+        if not recommendations:
+            recommendations.extend(fallback.get("no_recommendations", []))
+        return tuple(alerts), tuple(recommendations)
+
+    table = []
+    for temperature_mask in temperature_masks:
+        for humidity_mask in humidity_masks:
+            mask = temperature_mask & humidity_mask
+            advisory = advisories.get(mask)
+            if advisory is None:
+                advisory = advisories[mask] = advisory_for(mask)
+            table.append(advisory)
+    return CompiledCrop(axes["temperature"], axes["humidity"], table)
+
+def load_rules(path: Optional[str] = None) -> RuleEngine:
+    """Load and compile the rule file (ADVISORY_RULES_PATH, default advisory_rules.json)"""
+    with open(path or RULES_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    fallback = data.get("fallback", {})
+    crops = {
+        name.lower(): compile_crop(name, rules, fallback)
+        for name, rules in data.get("crops", {}).items()
+    }
+    return RuleEngine(crops, compile_crop("default", [], fallback))
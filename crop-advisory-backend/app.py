@@ -0,0 +1,378 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import httpx
+import sqlite3
+from datetime import datetime
+import asyncio
+import json
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+from advisory_log_writer import AdvisoryLogWriter
+from advisory_rules import load_rules
+from weather_cache import AsyncWeatherCache, normalize_location
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared weather API client and the log writer for the life of the process"""
+    global weather_client
+    weather_client = create_weather_client()
+    advisory_log.start()
+    try:
+        yield
+    finally:
+        await weather_client.aclose()
+        weather_client = None
+        # Writes out the queued log rows
+        advisory_log.close()
+
+app = FastAPI(title="Crop Advisory System", version="1.0.0", lifespan=lifespan)
+
+# CORS middleware for frontend integration
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, specify your domain
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Database setup
+def init_db():
+    conn = sqlite3.connect('advisory_logs.db')
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS advisory_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            location TEXT NOT NULL,
+            crop TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            temperature REAL,
+            humidity REAL,
+            alerts TEXT,
+            recommendations TEXT
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+# Initialize database on startup
+init_db()
+
+# Advisory logs are written by a background thread in batches: up to
+# ADVISORY_LOG_FLUSH_ROWS rows per transaction, at most ADVISORY_LOG_FLUSH_MS
+# after they were queued. Requests wait up to ADVISORY_LOG_SUBMIT_TIMEOUT
+# seconds for room once ADVISORY_LOG_MAX_PENDING rows are queued
+ADVISORY_LOG_FLUSH_ROWS = int(os.getenv("ADVISORY_LOG_FLUSH_ROWS", "500"))
+ADVISORY_LOG_FLUSH_MS = float(os.getenv("ADVISORY_LOG_FLUSH_MS", "200"))
+ADVISORY_LOG_MAX_PENDING = int(os.getenv("ADVISORY_LOG_MAX_PENDING", "10000"))
+ADVISORY_LOG_SUBMIT_TIMEOUT = float(os.getenv("ADVISORY_LOG_SUBMIT_TIMEOUT", "2"))
+advisory_log = AdvisoryLogWriter(
+    'advisory_logs.db',
+    flush_rows=ADVISORY_LOG_FLUSH_ROWS,
+    flush_interval=ADVISORY_LOG_FLUSH_MS / 1000,
+    max_pending=ADVISORY_LOG_MAX_PENDING,
+)
+
+class AdvisoryRequest(BaseModel):
+    name: str
+    location: str
+    crop: str
+
+class AdvisoryResponse(BaseModel):
+    location: str
+    temperature: float
+    humidity: float
+    alerts: List[str]
+    recommendations: List[str]
+    success: bool
+    message: str
+
+class BatchAdvisoryRequest(BaseModel):
+    entries: List[AdvisoryRequest]
+
+class BatchAdvisoryResponse(BaseModel):
+    results: List[AdvisoryResponse]
+    count: int
+    locations: int
+    success: bool
+    message: str
+
+# Batch advisories: entries per request, and weather fetches one batch may
+# have in flight at once
+ADVISORY_BATCH_MAX_ENTRIES = int(os.getenv("ADVISORY_BATCH_MAX_ENTRIES", "1000"))
+ADVISORY_BATCH_CONCURRENCY = int(os.getenv("ADVISORY_BATCH_CONCURRENCY", "8"))
+
+# OpenWeatherMap API configuration
+OPENWEATHER_API_KEY = "your_openweather_api_key_here"  # Replace with your API key
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5/weather")
+
+# Weather API client: one keep-alive connection pool per process. At most
+# WEATHER_MAX_CONCURRENCY calls are in flight; callers wait up to the read
+# timeout for a slot
+WEATHER_CONNECT_TIMEOUT = float(os.getenv("WEATHER_CONNECT_TIMEOUT", "3"))
+WEATHER_READ_TIMEOUT = float(os.getenv("WEATHER_READ_TIMEOUT", "5"))
+WEATHER_MAX_CONCURRENCY = int(os.getenv("WEATHER_MAX_CONCURRENCY", "20"))
+WEATHER_KEEPALIVE_SECONDS = float(os.getenv("WEATHER_KEEPALIVE_SECONDS", "30"))
+
+weather_client: Optional[httpx.AsyncClient] = None
+weather_slots = asyncio.Semaphore(WEATHER_MAX_CONCURRENCY)
+
+def create_weather_client() -> httpx.AsyncClient:
+    """Pooled client for the weather API; HTTP/2 when the h2 package is installed"""
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(WEATHER_READ_TIMEOUT, connect=WEATHER_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=WEATHER_MAX_CONCURRENCY,
+            max_keepalive_connections=WEATHER_MAX_CONCURRENCY,
+            keepalive_expiry=WEATHER_KEEPALIVE_SECONDS,
+        ),
+    )
+
+def get_weather_client() -> httpx.AsyncClient:
+    # Created on first use when the app runs without lifespan events
+    global weather_client
+    if weather_client is None:
+        weather_client = create_weather_client()
+    return weather_client
+
+# Weather cache: readings are reused for WEATHER_CACHE_TTL seconds, then
+# served stale for up to WEATHER_CACHE_STALE_TTL more while one refresh runs
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "300"))
+weather_cache = AsyncWeatherCache(ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_CACHE_STALE_TTL)
+
+# Returned when the weather API is unreachable (demo values, never cached)
+DEFAULT_WEATHER = {
+    "temperature": 25.0,
+    "humidity": 65.0,
+    "description": "Partly cloudy"
+}
+
+async def fetch_weather(location: str) -> dict:
+    """Fetch weather data from OpenWeatherMap API"""
+    params = {
+        "q": location,
+        "appid": OPENWEATHER_API_KEY,
+        "units": "metric"
+    }
+    await asyncio.wait_for(weather_slots.acquire(), WEATHER_READ_TIMEOUT)
+    try:
+        response = await get_weather_client().get(OPENWEATHER_BASE_URL, params=params)
+    finally:
+        weather_slots.release()
+    response.raise_for_status()
+    data = response.json()
+    
+    return {
+        "temperature": data["main"]["temp"],
+        "humidity": data["main"]["humidity"],
+        "description": data["weather"][0]["description"]
+    }
+
+async def get_weather_data(location: str) -> dict:
+    """Weather for a location, from the cache or OpenWeatherMap"""
+    try:
+        return await weather_cache.get(location, fetch_weather)
+    except Exception as e:
+        print(f"Weather API error: {e}")
+        # Return default values for demo purposes
+        return dict(DEFAULT_WEATHER)
+
+# Advisory rules (advisory_rules.json), compiled once at startup
+advisory_rules = load_rules()
+
+def generate_advisory(crop: str, temperature: float, humidity: float) -> tuple:
+    """Generate crop advisory based on weather conditions"""
+    return advisory_rules.evaluate(crop, temperature, humidity)
+
+async def log_advisory(name: str, location: str, crop: str, temperature: float, 
+                 humidity: float, alerts: List[str], recommendations: List[str]):
+    """Queue an advisory session for the advisory_logs writer"""
+    await log_advisories([(name, location, crop, temperature, humidity, alerts, recommendations)])
+
+async def log_advisories(rows: List[tuple]):
+    """Queue advisory sessions for the advisory_logs writer; they are committed together
+
+    Each row is (name, location, crop, temperature, humidity, alerts, recommendations).
+    """
+    if not await advisory_log.submit_async(rows, ADVISORY_LOG_SUBMIT_TIMEOUT):
+        print(f"Database logging error: log queue full or closed, dropped {len(rows)} rows")
+
+@app.post("/get-advisory", response_model=AdvisoryResponse)
+async def get_crop_advisory(request: AdvisoryRequest):
+    """Generate crop advisory based on location and weather"""
+    try:
+        # Get weather data
+        weather_data = await get_weather_data(request.location)
+        temperature = weather_data["temperature"]
+        humidity = weather_data["humidity"]
+        
+        # Generate advisory
+        alerts, recommendations = generate_advisory(
+            request.crop, temperature, humidity
+        )
+        
+        # Log the session
+        await log_advisory(
+            request.name, request.location, request.crop,
+            temperature, humidity, alerts, recommendations
+        )
+        
+        return AdvisoryResponse(
+            location=request.location,
+            temperature=temperature,
+            humidity=humidity,
+            alerts=alerts,
+            recommendations=recommendations,
+            success=True,
+            message="Advisory generated successfully"
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating advisory: {str(e)}")
+
+def group_by_location(entries: List[AdvisoryRequest]) -> List[List[int]]:
+    """Entry indexes per distinct (normalized) location, in first-seen order"""
+    groups = defaultdict(list)
+    for index, entry in enumerate(entries):
+        groups[normalize_location(entry.location)].append(index)
+    return list(groups.values())
+
+async def fetch_locations(entries: List[AdvisoryRequest]) -> AsyncIterator[Tuple[List[int], dict]]:
+    """Yield (entry indexes, weather) once per distinct location, as fetches complete"""
+    slots = asyncio.Semaphore(ADVISORY_BATCH_CONCURRENCY)
+
+    async def fetch(indexes: List[int]) -> Tuple[List[int], dict]:
+        async with slots:
+            return indexes, await get_weather_data(entries[indexes[0]].location)
+
+    tasks = [asyncio.ensure_future(fetch(indexes)) for indexes in group_by_location(entries)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def evaluate_entry(entry: AdvisoryRequest, weather_data: dict) -> Tuple[AdvisoryResponse, tuple]:
+    """Advisory for one entry and its advisory_logs row"""
+    temperature = weather_data["temperature"]
+    humidity = weather_data["humidity"]
+    alerts, recommendations = generate_advisory(entry.crop, temperature, humidity)
+    advisory = AdvisoryResponse(
+        location=entry.location,
+        temperature=temperature,
+        humidity=humidity,
+        alerts=alerts,
+        recommendations=recommendations,
+        success=True,
+        message="Advisory generated successfully"
+    )
+    return advisory, (entry.name, entry.location, entry.crop, temperature, humidity, alerts, recommendations)
+
+async def stream_advisories(entries: List[AdvisoryRequest]) -> AsyncIterator[str]:
+    """NDJSON lines, one per entry as its location's weather arrives"""
+    rows = []
+    try:
+        async for indexes, weather_data in fetch_locations(entries):
+            for index in indexes:
+                advisory, row = evaluate_entry(entries[index], weather_data)
+                rows.append(row)
+                yield json.dumps({"index": index, **advisory.model_dump()}, ensure_ascii=False) + "\n"
+    finally:
+        # Everything evaluated is logged, even if the client went away
+        await log_advisories(rows)
+
+@app.post("/get-advisory/batch", response_model=BatchAdvisoryResponse)
+async def get_crop_advisory_batch(request: BatchAdvisoryRequest, stream: bool = False):
+    """Advisories for many entries, fetching each distinct location's weather once
+
+    Results are returned in entry order. With ?stream=true they are sent as
+    NDJSON as each completes instead, each line carrying its entry's index.
+    """
+    entries = request.entries
+    if len(entries) > ADVISORY_BATCH_MAX_ENTRIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many entries: {len(entries)} (maximum {ADVISORY_BATCH_MAX_ENTRIES})"
+        )
+    if stream:
+        return StreamingResponse(stream_advisories(entries), media_type="application/x-ndjson")
+
+    try:
+        results = [None] * len(entries)
+        rows = [None] * len(entries)
+        locations = 0
+        async for indexes, weather_data in fetch_locations(entries):
+            locations += 1
+            for index in indexes:
+                results[index], rows[index] = evaluate_entry(entries[index], weather_data)
+        await log_advisories(rows)
+
+        return BatchAdvisoryResponse(
+            results=results,
+            count=len(results),
+            locations=locations,
+            success=True,
+            message="Advisories generated successfully"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating advisories: {str(e)}")
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return {"status": "healthy", "service": "Crop Advisory System"}
+
+@app.get("/weather-cache")
+async def weather_cache_stats():
+    """Weather cache hit/miss counters and hit rate"""
+    return weather_cache.stats()
+
+@app.get("/logs")
+async def get_logs():
+    """Get recent advisory logs (for debugging)"""
+    try:
+        conn = sqlite3.connect('advisory_logs.db')
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT name, location, crop, timestamp, temperature, humidity, alerts, recommendations
+            FROM advisory_logs 
+            ORDER BY timestamp DESC 
+            LIMIT 10
+        ''')
+        logs = cursor.fetchall()
+        conn.close()
+        
+        return {
+            "logs": [
+                {
+                    "name": log[0],
+                    "location": log[1],
+                    "crop": log[2],
+                    "timestamp": log[3],
+                    "temperature": log[4],
+                    "humidity": log[5],
+                    "alerts": log[6],
+                    "recommendations": log[7]
+                }
+                for log in logs
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Weather client benchmark: shared pooled client vs a new client per call
+
+Starts a local stand-in for the OpenWeatherMap endpoint (HTTP/1.1 with
+keep-alive and a configurable response delay), points app.py at it and
+calls fetch_weather() --calls times at --concurrency, bypassing the cache.
+Reports throughput, latency percentiles and how many TCP connections the
+stand-in accepted. Pass --per-call to open a fresh httpx.AsyncClient for
+every call, as get_weather_data did before the shared client.
+
+Usage: python benchmarks/bench_weather_client.py [--calls N] [--concurrency N] [--delay-ms N] [--per-call]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class StandInWeather(BaseHTTPRequestHandler):
+    """Answers every GET with a fixed OpenWeatherMap-shaped body"""
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    connections = 0
+    lock = threading.Lock()
+    body = json.dumps({
+        "main": {"temp": 27.5, "humidity": 68},
+        "weather": [{"description": "scattered clouds"}],
+    }).encode()
+
+    def setup(self):
+        super().setup()
+        with StandInWeather.lock:
+            StandInWeather.connections += 1
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--delay-ms", type=float, default=2.0, help="Stand-in server response delay")
+    parser.add_argument("--per-call", action="store_true", help="New client per call (previous behaviour)")
+    args = parser.parse_args()
+
+    StandInWeather.delay = args.delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInWeather)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENWEATHER_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/data/2.5/weather"
+
+    # app.py creates advisory_logs.db in the working directory on import
+    os.chdir(tempfile.mkdtemp(prefix="bench_weather_"))
+    import httpx
+    import app
+
+    if args.per_call:
+        async def fetch(location):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(app.OPENWEATHER_BASE_URL, params={"q": location})
+                response.raise_for_status()
+                return response.json()
+    else:
+        fetch = app.fetch_weather
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples = []
+
+    async def call(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await fetch(f"Town {i}")
+            samples.append((time.perf_counter() - started) * 1000)
+
+    async with app.lifespan(app.app):
+        await fetch("warm-up")
+        StandInWeather.connections = 0
+        started = time.perf_counter()
+        await asyncio.gather(*(call(i) for i in range(args.calls)))
+        elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    mode = "new client per call" if args.per_call else f"shared client (pool {app.WEATHER_MAX_CONCURRENCY})"
+    print(f"🌦️ Weather client: {args.calls} calls, concurrency {args.concurrency}, "
+          f"upstream delay {args.delay_ms:g}ms, {mode}")
+    print(f"  - Duration: {elapsed:.2f}s ({args.calls / elapsed:.0f} calls/s), "
+          f"TCP connections opened: {StandInWeather.connections}")
+    print(f"  - Latency p50={percentile(samples, 50):6.2f}ms  "
+          f"p95={percentile(samples, 95):6.2f}ms  p99={percentile(samples, 99):6.2f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
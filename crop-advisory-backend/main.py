@@ -1,10 +1,19 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
 import sqlite3
 from datetime import datetime
+import atexit
+import json
 import os
-from typing import List, Optional
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+from advisory_log_writer import AdvisoryLogWriter
+from advisory_rules import load_rules
+from weather_cache import WeatherCache, normalize_location
 
 app = Flask(__name__)
 CORS(app)
@@ -32,142 +41,117 @@ def init_db():
 # Initialize database on startup
 init_db()
 
+# Advisory logs are written by a background thread in batches: up to
+# ADVISORY_LOG_FLUSH_ROWS rows per transaction, at most ADVISORY_LOG_FLUSH_MS
+# after they were queued. Requests wait up to ADVISORY_LOG_SUBMIT_TIMEOUT
+# seconds for room once ADVISORY_LOG_MAX_PENDING rows are queued
+ADVISORY_LOG_FLUSH_ROWS = int(os.getenv("ADVISORY_LOG_FLUSH_ROWS", "500"))
+ADVISORY_LOG_FLUSH_MS = float(os.getenv("ADVISORY_LOG_FLUSH_MS", "200"))
+ADVISORY_LOG_MAX_PENDING = int(os.getenv("ADVISORY_LOG_MAX_PENDING", "10000"))
+ADVISORY_LOG_SUBMIT_TIMEOUT = float(os.getenv("ADVISORY_LOG_SUBMIT_TIMEOUT", "2"))
+advisory_log = AdvisoryLogWriter(
+    'advisory_logs.db',
+    flush_rows=ADVISORY_LOG_FLUSH_ROWS,
+    flush_interval=ADVISORY_LOG_FLUSH_MS / 1000,
+    max_pending=ADVISORY_LOG_MAX_PENDING,
+)
+advisory_log.start()
+atexit.register(advisory_log.close)
+
 # OpenWeatherMap API configuration
 OPENWEATHER_API_KEY = "your_openweather_api_key_here"  # Replace with your API key
-OPENWEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5/weather")
 
-def get_weather_data(location: str) -> dict:
+# Weather API client: one keep-alive session per process, closed at exit. At
+# most WEATHER_MAX_CONCURRENCY calls are in flight; callers wait up to the
+# read timeout for a slot
+WEATHER_CONNECT_TIMEOUT = float(os.getenv("WEATHER_CONNECT_TIMEOUT", "3"))
+WEATHER_READ_TIMEOUT = float(os.getenv("WEATHER_READ_TIMEOUT", "5"))
+WEATHER_MAX_CONCURRENCY = int(os.getenv("WEATHER_MAX_CONCURRENCY", "20"))
+
+def create_weather_session() -> requests.Session:
+    """Pooled session for the weather API (requests has no HTTP/2)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=WEATHER_MAX_CONCURRENCY)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+weather_session = create_weather_session()
+weather_slots = threading.BoundedSemaphore(WEATHER_MAX_CONCURRENCY)
+atexit.register(weather_session.close)
+
+# Weather cache: readings are reused for WEATHER_CACHE_TTL seconds, then
+# served stale for up to WEATHER_CACHE_STALE_TTL more while one refresh runs
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "300"))
+weather_cache = WeatherCache(ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_CACHE_STALE_TTL)
+
+# Batch advisories: entries per request, and weather fetches one batch may
+# have in flight at once
+ADVISORY_BATCH_MAX_ENTRIES = int(os.getenv("ADVISORY_BATCH_MAX_ENTRIES", "1000"))
+ADVISORY_BATCH_CONCURRENCY = int(os.getenv("ADVISORY_BATCH_CONCURRENCY", "8"))
+
+# Returned when the weather API is unreachable (demo values, never cached)
+DEFAULT_WEATHER = {
+    "temperature": 25.0,
+    "humidity": 65.0,
+    "description": "Partly cloudy"
+}
+
+def fetch_weather(location: str) -> dict:
     """Fetch weather data from OpenWeatherMap API"""
+    params = {
+        "q": location,
+        "appid": OPENWEATHER_API_KEY,
+        "units": "metric"
+    }
+    if not weather_slots.acquire(timeout=WEATHER_READ_TIMEOUT):
+        raise TimeoutError("Too many concurrent weather API calls")
     try:
-        params = {
-            "q": location,
-            "appid": OPENWEATHER_API_KEY,
-            "units": "metric"
-        }
-        response = requests.get(OPENWEATHER_BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        return {
-            "temperature": data["main"]["temp"],
-            "humidity": data["main"]["humidity"],
-            "description": data["weather"][0]["description"]
-        }
+        response = weather_session.get(
+            OPENWEATHER_BASE_URL, params=params,
+            timeout=(WEATHER_CONNECT_TIMEOUT, WEATHER_READ_TIMEOUT)
+        )
+    finally:
+        weather_slots.release()
+    response.raise_for_status()
+    data = response.json()
+    
+    return {
+        "temperature": data["main"]["temp"],
+        "humidity": data["main"]["humidity"],
+        "description": data["weather"][0]["description"]
+    }
+
+def get_weather_data(location: str) -> dict:
+    """Weather for a location, from the cache or OpenWeatherMap"""
+    try:
+        return weather_cache.get(location, fetch_weather)
     except Exception as e:
         print(f"Weather API error: {e}")
         # Return default values for demo purposes
-        return {
-            "temperature": 25.0,
-            "humidity": 65.0,
-            "description": "Partly cloudy"
-        }
+        return dict(DEFAULT_WEATHER)
+
+# Advisory rules (advisory_rules.json), compiled once at startup
+advisory_rules = load_rules()
 
 def generate_advisory(crop: str, temperature: float, humidity: float) -> tuple:
     """Generate crop advisory based on weather conditions"""
-    alerts = []
-    recommendations = []
-    
-    # Wheat advisory logic
-    if crop.lower() == "wheat":
-        if humidity > 70:
-            alerts.append("⚠️ High risk of wheat rust due to high humidity")
-            recommendations.append("Apply Mancozeb fungicide (2.5 kg/ha)")
-            recommendations.append("Reduce irrigation frequency")
-        
-        if temperature > 30:
-            alerts.append("🌡️ High temperature stress detected")
-            recommendations.append("Increase irrigation frequency")
-            recommendations.append("Apply foliar spray with micronutrients")
-        
-        if temperature < 15:
-            alerts.append("❄️ Low temperature may affect growth")
-            recommendations.append("Delay irrigation until temperature rises")
-            recommendations.append("Consider using row covers")
-        
-        if 20 <= temperature <= 25 and 50 <= humidity <= 65:
-            recommendations.append("✅ Optimal conditions for wheat growth")
-            recommendations.append("Continue regular irrigation schedule")
-            recommendations.append("Monitor for early signs of pests")
-    
-    # Tomato advisory logic
-    elif crop.lower() == "tomato":
-        if humidity > 80:
-            alerts.append("⚠️ High risk of early blight and late blight")
-            recommendations.append("Apply Copper oxychloride (3g/liter)")
-            recommendations.append("Improve air circulation")
-            recommendations.append("Avoid overhead irrigation")
-        
-        if temperature > 35:
-            alerts.append("🌡️ Heat stress may cause flower drop")
-            recommendations.append("Increase shade net coverage")
-            recommendations.append("Apply calcium nitrate foliar spray")
-            recommendations.append("Water in early morning or evening")
-        
-        if temperature < 10:
-            alerts.append("❄️ Cold stress may affect fruit setting")
-            recommendations.append("Use plastic mulch to retain soil heat")
-            recommendations.append("Consider greenhouse cultivation")
-        
-        if 20 <= temperature <= 30 and 60 <= humidity <= 70:
-            recommendations.append("✅ Optimal conditions for tomato growth")
-            recommendations.append("Maintain regular pruning schedule")
-            recommendations.append("Monitor for whitefly and aphids")
-    
-    # Cotton advisory logic
-    elif crop.lower() == "cotton":
-        if humidity > 75:
-            alerts.append("⚠️ High risk of bacterial blight and boll rot")
-            recommendations.append("Apply Streptomycin sulfate (500 ppm)")
-            recommendations.append("Remove infected plant parts")
-            recommendations.append("Improve field drainage")
-        
-        if temperature > 40:
-            alerts.append("🌡️ Extreme heat may cause boll shedding")
-            recommendations.append("Increase irrigation frequency")
-            recommendations.append("Apply potassium nitrate spray")
-            recommendations.append("Use shade nets during peak hours")
-        
-        if temperature < 15:
-            alerts.append("❄️ Cold stress may delay flowering")
-            recommendations.append("Delay sowing until temperature rises")
-            recommendations.append("Use plastic mulch for soil warming")
-        
-        if 25 <= temperature <= 35 and 50 <= humidity <= 70:
-            recommendations.append("✅ Optimal conditions for cotton growth")
-            recommendations.append("Monitor for pink bollworm")
-            recommendations.append("Maintain proper plant spacing")
-            recommendations.append("Apply balanced NPK fertilizer")
-    
-    # General recommendations based on weather
-    if not alerts:
-        recommendations.append("🌤️ Weather conditions are favorable for crop growth")
-    
-    if not recommendations:
-        recommendations.append("📋 Continue with regular farming practices")
-        recommendations.append("🔍 Monitor crop health regularly")
-    
-    return alerts, recommendations
+    return advisory_rules.evaluate(crop, temperature, humidity)
 
 def log_advisory(name: str, location: str, crop: str, temperature: float, 
                  humidity: float, alerts: List[str], recommendations: List[str]):
-    """Log advisory session to SQLite database"""
-    try:
-        conn = sqlite3.connect('advisory_logs.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO advisory_logs 
-            (name, location, crop, temperature, humidity, alerts, recommendations)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            name, location, crop, temperature, humidity,
-            '; '.join(alerts), '; '.join(recommendations)
-        ))
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Database logging error: {e}")
+    """Queue an advisory session for the advisory_logs writer"""
+    log_advisories([(name, location, crop, temperature, humidity, alerts, recommendations)])
+
+def log_advisories(rows: List[tuple]):
+    """Queue advisory sessions for the advisory_logs writer; they are committed together
+
+    Each row is (name, location, crop, temperature, humidity, alerts, recommendations).
+    """
+    if not advisory_log.submit(rows, ADVISORY_LOG_SUBMIT_TIMEOUT):
+        print(f"Database logging error: log queue full or closed, dropped {len(rows)} rows")
 
 @app.route('/get-advisory', methods=['POST'])
 def get_crop_advisory():
@@ -206,11 +190,110 @@ def get_crop_advisory():
     except Exception as e:
         return jsonify({"error": f"Error generating advisory: {str(e)}"}), 500
 
+def group_by_location(entries: List[dict]) -> List[List[int]]:
+    """Entry indexes per distinct (normalized) location, in first-seen order"""
+    groups = defaultdict(list)
+    for index, entry in enumerate(entries):
+        groups[normalize_location(entry['location'])].append(index)
+    return list(groups.values())
+
+def fetch_locations(entries: List[dict]) -> Iterator[Tuple[List[int], dict]]:
+    """Yield (entry indexes, weather) once per distinct location, as fetches complete"""
+    pool = ThreadPoolExecutor(max_workers=ADVISORY_BATCH_CONCURRENCY)
+    try:
+        futures = {
+            pool.submit(get_weather_data, entries[indexes[0]]['location']): indexes
+            for indexes in group_by_location(entries)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def evaluate_entry(entry: dict, weather_data: dict) -> Tuple[dict, tuple]:
+    """Advisory for one entry and its advisory_logs row"""
+    temperature = weather_data["temperature"]
+    humidity = weather_data["humidity"]
+    alerts, recommendations = generate_advisory(entry['crop'], temperature, humidity)
+    advisory = {
+        "location": entry['location'],
+        "temperature": temperature,
+        "humidity": humidity,
+        "alerts": alerts,
+        "recommendations": recommendations,
+        "success": True,
+        "message": "Advisory generated successfully"
+    }
+    return advisory, (entry['name'], entry['location'], entry['crop'],
+                      temperature, humidity, alerts, recommendations)
+
+def stream_advisories(entries: List[dict]) -> Iterator[str]:
+    """NDJSON lines, one per entry as its location's weather arrives"""
+    rows = []
+    try:
+        for indexes, weather_data in fetch_locations(entries):
+            for index in indexes:
+                advisory, row = evaluate_entry(entries[index], weather_data)
+                rows.append(row)
+                yield json.dumps({"index": index, **advisory}, ensure_ascii=False) + "\n"
+    finally:
+        # Everything evaluated is logged, even if the client went away
+        log_advisories(rows)
+
+@app.route('/get-advisory/batch', methods=['POST'])
+def get_crop_advisory_batch():
+    """Advisories for many entries, fetching each distinct location's weather once
+
+    Results are returned in entry order. With ?stream=true they are sent as
+    NDJSON as each completes instead, each line carrying its entry's index.
+    """
+    try:
+        data = request.get_json()
+        entries = data.get('entries') if isinstance(data, dict) else None
+        
+        if not isinstance(entries, list) or not all(
+            isinstance(entry, dict) and 'name' in entry and 'location' in entry and 'crop' in entry
+            for entry in entries
+        ):
+            return jsonify({"error": "Expected entries: a list of objects with name, location, crop"}), 400
+        if len(entries) > ADVISORY_BATCH_MAX_ENTRIES:
+            return jsonify({
+                "error": f"Too many entries: {len(entries)} (maximum {ADVISORY_BATCH_MAX_ENTRIES})"
+            }), 400
+        
+        if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return Response(stream_advisories(entries), mimetype='application/x-ndjson')
+        
+        results = [None] * len(entries)
+        rows = [None] * len(entries)
+        locations = 0
+        for indexes, weather_data in fetch_locations(entries):
+            locations += 1
+            for index in indexes:
+                results[index], rows[index] = evaluate_entry(entries[index], weather_data)
+        log_advisories(rows)
+        
+        return jsonify({
+            "results": results,
+            "count": len(results),
+            "locations": locations,
+            "success": True,
+            "message": "Advisories generated successfully"
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Error generating advisories: {str(e)}"}), 500
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "service": "Crop Advisory System"})
 
+@app.route('/weather-cache')
+def weather_cache_stats():
+    """Weather cache hit/miss counters and hit rate"""
+    return jsonify(weather_cache.stats())
+
 @app.route('/logs')
 def get_logs():
     """Get recent advisory logs (for debugging)"""
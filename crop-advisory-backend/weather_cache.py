@@ -0,0 +1,186 @@
+"""
+In-process TTL cache for weather lookups, shared by app.py and main.py
+
+Entries are keyed by the normalized location, so "Pune", " pune " and
+"PUNE" share one upstream call. An entry is fresh for `ttl` seconds and is
+then served stale for up to `stale_ttl` more while a single background
+refresh runs; past that it is a miss again. Concurrent misses for the same
+location wait on one in-flight fetch instead of each calling upstream
+(single-flight). A failed fetch is never cached: waiters get the error and
+a failed refresh keeps the stale value.
+
+WeatherCache is for the threaded Flask app, AsyncWeatherCache for the
+FastAPI app; both report the same counters through stats().
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+def normalize_location(location: str) -> str:
+    """Cache key for a location: case-folded with whitespace collapsed"""
+    return " ".join(location.split()).casefold()
+
+class _CacheStore:
+    """Entries, LRU bound and counters; callers serialize access"""
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                         "refreshes": 0, "errors": 0, "evictions": 0}
+
+    def lookup(self, key: str) -> Tuple[str, Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return MISS, None
+        value, fetched_at = entry
+        age = time.monotonic() - fetched_at
+        if age < self.ttl:
+            self.entries.move_to_end(key)
+            return FRESH, value
+        if age < self.ttl + self.stale_ttl:
+            self.entries.move_to_end(key)
+            return STALE, value
+        del self.entries[key]
+        return MISS, None
+
+    def store(self, key: str, value: Any) -> None:
+        self.entries[key] = (value, time.monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        counters = dict(self.counters)
+        lookups = counters["hits"] + counters["stale_hits"] + counters["misses"] + counters["coalesced"]
+        served = counters["hits"] + counters["stale_hits"] + counters["coalesced"]
+        return {
+            **counters,
+            "lookups": lookups,
+            # Share of lookups that did not start an upstream call
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries),
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+        }
+
+class WeatherCache:
+    """Thread-safe cache; fetch(location) is a blocking call"""
+
+    def __init__(self, ttl: float = 600, stale_ttl: float = 300, max_entries: int = 10000):
+        self._store = _CacheStore(ttl, stale_ttl, max_entries)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    def get(self, location: str, fetch: Callable[[str], Any]) -> Any:
+        key = normalize_location(location)
+        counters = self._store.counters
+        with self._lock:
+            state, value = self._store.lookup(key)
+            if state == FRESH:
+                counters["hits"] += 1
+                return value
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = Future()
+            if state == STALE:
+                counters["stale_hits"] += 1
+                counters["refreshes"] += leader
+            elif leader:
+                counters["misses"] += 1
+            else:
+                counters["coalesced"] += 1
+
+        if state == STALE:
+            if leader:
+                threading.Thread(target=self._load, args=(key, location, fetch, pending), daemon=True).start()
+            return value
+        if leader:
+            self._load(key, location, fetch, pending)
+        return pending.result()
+
+    def _load(self, key: str, location: str, fetch: Callable[[str], Any], pending: Future) -> None:
+        """Run the fetch and publish its outcome to everyone waiting on ``pending``"""
+        try:
+            value = fetch(location)
+        except Exception as e:
+            with self._lock:
+                self._store.counters["errors"] += 1
+                del self._inflight[key]
+            pending.set_exception(e)
+            return
+        with self._lock:
+            self._store.store(key, value)
+            del self._inflight[key]
+        pending.set_result(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._store.stats(), "inflight": len(self._inflight)}
+
+class AsyncWeatherCache:
+    """Event-loop cache; fetch(location) is a coroutine function"""
+
+    def __init__(self, ttl: float = 600, stale_ttl: float = 300, max_entries: int = 10000):
+        self._store = _CacheStore(ttl, stale_ttl, max_entries)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, location: str, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        key = normalize_location(location)
+        counters = self._store.counters
+        state, value = self._store.lookup(key)
+        if state == FRESH:
+            counters["hits"] += 1
+            return value
+        task = self._inflight.get(key)
+        if state == STALE:
+            counters["stale_hits"] += 1
+            if task is None:
+                counters["refreshes"] += 1
+                self._start(key, location, fetch)
+            return value
+        if task is not None:
+            counters["coalesced"] += 1
+        else:
+            counters["misses"] += 1
+            task = self._start(key, location, fetch)
+        # Shielded so a caller that disconnects does not cancel the fetch
+        # the other waiters share
+        return await asyncio.shield(task)
+
+    def _start(self, key: str, location: str, fetch: Callable[[str], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight[key] = asyncio.ensure_future(self._load(key, location, fetch))
+        # Retrieve the error of refreshes nobody awaits
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _load(self, key: str, location: str, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch(location)
+        except BaseException:
+            self._store.counters["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._store.store(key, value)
+        return value
+
+    def clear(self) -> None:
+        self._store.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._store.stats(), "inflight": len(self._inflight)}